@@ -1,17 +1,62 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
 from app.models.database import get_db, Email, EmailStats
+from app.models.analysis import EmailSentimentIndicator
 from app.models.schemas import DashboardStats
+from app.services.cache_service import dashboard_cache
+from app.services.usage_service import UsageService
 
 router = APIRouter()
 
+usage_service = UsageService()
+
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(request: Request, db: Session = Depends(get_db)):
     """Get comprehensive dashboard statistics"""
+    return await dashboard_cache.respond(request, "stats", lambda: _compute_dashboard_stats(db))
+
+@router.get("/recent-emails")
+async def get_recent_emails(request: Request, limit: int = 10, db: Session = Depends(get_db)):
+    """Get recent emails for dashboard preview"""
+    return await dashboard_cache.respond(
+        request, f"recent-emails:{limit}", lambda: _compute_recent_emails(limit, db)
+    )
+
+@router.get("/category-stats")
+async def get_category_stats(request: Request, db: Session = Depends(get_db)):
+    """Get email statistics by category"""
+    return await dashboard_cache.respond(request, "category-stats", lambda: _compute_category_stats(db))
+
+@router.get("/response-stats")
+async def get_response_stats(request: Request, db: Session = Depends(get_db)):
+    """Get response statistics"""
+    return await dashboard_cache.respond(request, "response-stats", lambda: _compute_response_stats(db))
+
+@router.get("/performance-metrics")
+async def get_performance_metrics(request: Request, days: int = 7, db: Session = Depends(get_db)):
+    """Get performance metrics over specified days"""
+    return await dashboard_cache.respond(
+        request, f"performance-metrics:{days}", lambda: _compute_performance_metrics(days, db)
+    )
+
+@router.get("/indicator-stats")
+async def get_indicator_stats(request: Request, db: Session = Depends(get_db)):
+    """Get sentiment indicator frequencies for the last 24 hours"""
+    return await dashboard_cache.respond(request, "indicator-stats", lambda: _compute_indicator_stats(db))
+
+@router.get("/llm-usage")
+async def get_llm_usage(request: Request, days: int = 7, db: Session = Depends(get_db)):
+    """Get prompt/completion token usage, estimated cost and LLM latency per day"""
+    return await dashboard_cache.respond(
+        request, f"llm-usage:{days}", lambda: usage_service.summary(db, days)
+    )
+
+def _compute_dashboard_stats(db: Session) -> DashboardStats:
+    """Compute comprehensive dashboard statistics"""
     
     # Calculate 24 hours ago
     twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
@@ -103,11 +148,10 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
         hourly_stats=hourly_stats
     )
 
-@router.get("/recent-emails")
-async def get_recent_emails(limit: int = 10, db: Session = Depends(get_db)):
-    """Get recent emails for dashboard preview"""
+def _compute_recent_emails(limit: int, db: Session) -> List[Dict[str, Any]]:
+    """Compute recent emails for dashboard preview"""
     emails = db.query(Email).order_by(
-        Email.priority.desc(),
+        case((Email.priority == "urgent", 0), else_=1),
         Email.received_at.desc()
     ).limit(limit).all()
     
@@ -122,9 +166,8 @@ async def get_recent_emails(limit: int = 10, db: Session = Depends(get_db)):
         "category": email.category
     } for email in emails]
 
-@router.get("/category-stats")
-async def get_category_stats(db: Session = Depends(get_db)):
-    """Get email statistics by category"""
+def _compute_category_stats(db: Session) -> Dict[str, Any]:
+    """Compute email statistics by category"""
     twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
     
     category_stats = db.query(
@@ -141,9 +184,32 @@ async def get_category_stats(db: Session = Depends(get_db)):
         ]
     }
 
-@router.get("/response-stats")
-async def get_response_stats(db: Session = Depends(get_db)):
-    """Get response statistics"""
+def _compute_indicator_stats(db: Session) -> Dict[str, Any]:
+    """Compute sentiment indicator frequencies for the last 24 hours"""
+    twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
+    
+    indicator_stats = db.query(
+        EmailSentimentIndicator.indicator,
+        func.count(EmailSentimentIndicator.id)
+    ).join(
+        Email, Email.id == EmailSentimentIndicator.email_id
+    ).filter(
+        Email.received_at >= twenty_four_hours_ago
+    ).group_by(
+        EmailSentimentIndicator.indicator
+    ).order_by(
+        func.count(EmailSentimentIndicator.id).desc()
+    ).all()
+    
+    return {
+        "indicators": [
+            {"indicator": indicator, "count": count}
+            for indicator, count in indicator_stats
+        ]
+    }
+
+def _compute_response_stats(db: Session) -> Dict[str, Any]:
+    """Compute response statistics"""
     twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
     
     # Total emails that need responses
@@ -193,9 +259,8 @@ async def get_response_stats(db: Session = Depends(get_db)):
         "avg_response_time_hours": round(avg_response_time_hours, 2)
     }
 
-@router.get("/performance-metrics")
-async def get_performance_metrics(days: int = 7, db: Session = Depends(get_db)):
-    """Get performance metrics over specified days"""
+def _compute_performance_metrics(days: int, db: Session) -> Dict[str, Any]:
+    """Compute performance metrics over specified days"""
     start_date = datetime.utcnow() - timedelta(days=days)
     
     # Daily email counts
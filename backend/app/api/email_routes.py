@@ -1,20 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import logging
+from fastapi import APIRouter, Depends, Header, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
-from typing import List, Dict, Any
+from sqlalchemy import desc, and_, case
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import json
+import asyncio
 
-from app.models.database import get_db, Email
+from app.models.database import get_db, SessionLocal, Email
+from app.models.archive import ArchivedEmail
+from app.models.bulk_requests import BulkSelection, BulkUpdateRequest
 from app.models.schemas import EmailResponse, EmailCreate, EmailUpdate, GenerateResponseRequest
 from app.services.email_service import EmailService
 from app.services.ai_service import AIService
+from app.services.cache_service import dashboard_cache
+from app.services.search_service import SearchService
+from app.services.clustering_service import ClusteringService
+from app.services.similarity_service import similarity_service
+from app.services.queue_service import QueueService
+from app.services.analysis_store import AnalysisStore
+from app.services.attachment_service import AttachmentService
+from app.services.archive_service import ArchiveService
+from app.services.change_log_service import ChangeLogService
+from app.services.bulk_email_service import BulkEmailService
+from app.services.export_service import ExportService
+from app.services.write_queue import write_queue
+from app.services.usage_service import UsageService
+from app.services.draft_service import DraftService
+from app.services.idempotency_service import IdempotencyService
+from app.services.customer_profile_service import customer_profile_service
+from app.utils.coalescing import InFlightRequests
+from app.utils.serialization import FastJSONResponse
+from app.utils.helpers import content_disposition
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 # Initialize services
 email_service = EmailService()
 ai_service = AIService()
+search_service = SearchService()
+clustering_service = ClusteringService()
+queue_service = QueueService()
+analysis_store = AnalysisStore()
+attachment_service = AttachmentService()
+archive_service = ArchiveService()
+change_log_service = ChangeLogService()
+bulk_email_service = BulkEmailService()
+export_service = ExportService()
+usage_service = UsageService()
+draft_service = DraftService(ai_service)
+idempotency_service = IdempotencyService()
+generation_flights = InFlightRequests("generate_response")
+
+# Explicit urgent-first ordering instead of relying on string sort order
+priority_order = case((Email.priority == "urgent", 0), else_=1)
+
+def _filtered_emails(db: Session, model, priority_filter: str, sentiment_filter: str, processed_filter: bool):
+    """List query with the standard filters and urgent-first ordering, for the hot or archive table"""
+    query = db.query(model)
+    
+    # Apply filters
+    if priority_filter:
+        query = query.filter(model.priority == priority_filter)
+    if sentiment_filter:
+        query = query.filter(model.sentiment == sentiment_filter)
+    if processed_filter is not None:
+        query = query.filter(model.processed == processed_filter)
+    
+    # Order by priority (urgent first) then by received date
+    return query.order_by(
+        case((model.priority == "urgent", 0), else_=1),  # urgent comes first
+        desc(model.received_at)
+    )
 
 @router.get("/", response_model=List[EmailResponse])
 async def get_emails(
@@ -23,27 +84,25 @@ async def get_emails(
     priority_filter: str = None,
     sentiment_filter: str = None,
     processed_filter: bool = None,
+    include_archived: bool = False,
     db: Session = Depends(get_db)
 ):
     """Get all emails with optional filtering"""
-    query = db.query(Email)
-    
-    # Apply filters
-    if priority_filter:
-        query = query.filter(Email.priority == priority_filter)
-    if sentiment_filter:
-        query = query.filter(Email.sentiment == sentiment_filter)
-    if processed_filter is not None:
-        query = query.filter(Email.processed == processed_filter)
+    if not include_archived:
+        return _filtered_emails(
+            db, Email, priority_filter, sentiment_filter, processed_filter
+        ).offset(skip).limit(limit).all()
     
-    # Order by priority (urgent first) then by received date
-    query = query.order_by(
-        Email.priority.desc(),  # urgent comes first
-        desc(Email.received_at)
-    )
+    # Each table supplies its first skip+limit rows; merge them in the same order
+    emails = []
+    for model in (Email, ArchivedEmail):
+        emails.extend(_filtered_emails(
+            db, model, priority_filter, sentiment_filter, processed_filter
+        ).limit(skip + limit).all())
     
-    emails = query.offset(skip).limit(limit).all()
-    return emails
+    emails.sort(key=lambda email: email.received_at or datetime.min, reverse=True)
+    emails.sort(key=lambda email: 0 if email.priority == "urgent" else 1)
+    return emails[skip:skip + limit]
 
 @router.get("/urgent", response_model=List[EmailResponse])
 async def get_urgent_emails(db: Session = Depends(get_db)):
@@ -59,19 +118,148 @@ async def get_unprocessed_emails(db: Session = Depends(get_db)):
     emails = db.query(Email).filter(
         Email.processed == False
     ).order_by(
-        Email.priority.desc(),
+        priority_order,
         desc(Email.received_at)
     ).all()
     return emails
 
+@router.get("/queue")
+async def get_work_queue(limit: int = 20, db: Session = Depends(get_db)):
+    """Get the next open emails to work on, most pressing first"""
+    return queue_service.next_emails(db, limit=limit)
+
+@router.get("/changes")
+async def get_email_changes(since: int = None, limit: int = None, db: Session = Depends(get_db)):
+    """Emails inserted, updated or deleted since a sync token (omit `since` to get the current token)"""
+    if since is None:
+        return {"next": change_log_service.latest_version(db), "has_more": False, "upserted": [], "deleted": []}
+    
+    if change_log_service.is_expired(db, since):
+        raise HTTPException(status_code=410, detail="Sync token expired; reload the full list")
+    
+    return change_log_service.changes_since(db, since, limit=limit)
+
+@router.get("/export")
+async def export_emails(
+    format: str = "csv",
+    priority_filter: str = None,
+    sentiment_filter: str = None,
+    processed_filter: bool = None
+):
+    """Stream all matching emails as CSV, NDJSON or Parquet (same filters as the list)"""
+    try:
+        export_service.check_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        export_service.stream(
+            format,
+            priority_filter=priority_filter,
+            sentiment_filter=sentiment_filter,
+            processed_filter=processed_filter
+        ),
+        media_type=export_service.media_types[format],
+        headers={"Content-Disposition": f'attachment; filename="{export_service.filename(format)}"'}
+    )
+
+@router.get("/search")
+async def search_emails(
+    q: str,
+    skip: int = 0,
+    limit: int = 20,
+    priority_filter: str = None,
+    sentiment_filter: str = None,
+    processed_filter: bool = None,
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Full-text search over subject and body, ranked by relevance"""
+    results = search_service.search(
+        db, q,
+        skip=skip,
+        limit=limit,
+        priority_filter=priority_filter,
+        sentiment_filter=sentiment_filter,
+        processed_filter=processed_filter,
+        include_archived=include_archived
+    )
+    return {"query": q, "count": len(results), "results": results}
+
 @router.get("/{email_id}", response_model=EmailResponse)
 async def get_email(email_id: int, db: Session = Depends(get_db)):
     """Get specific email by ID"""
     email = db.query(Email).filter(Email.id == email_id).first()
+    if not email:
+        # Old processed emails live in the archive table
+        email = archive_service.get(db, email_id)
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
     return email
 
+@router.get("/{email_id}/cluster")
+async def get_email_cluster(email_id: int, db: Session = Depends(get_db)):
+    """Get the near-duplicate cluster and thread an email belongs to"""
+    cluster = clustering_service.get_cluster(db, email_id)
+    if not cluster:
+        raise HTTPException(status_code=404, detail="Email is not clustered")
+    
+    members = clustering_service.get_cluster_members(db, cluster.cluster_id)
+    thread_members = clustering_service.get_thread_members(db, cluster.thread_id)
+    
+    def describe(member: Email) -> Dict[str, Any]:
+        return {
+            "id": member.id,
+            "sender_email": member.sender_email,
+            "subject": member.subject,
+            "received_at": member.received_at,
+            "processed": member.processed,
+            "has_response": bool(member.ai_response)
+        }
+    
+    return {
+        "email_id": email_id,
+        "cluster_id": cluster.cluster_id,
+        "thread_id": cluster.thread_id,
+        "members": [describe(member) for member in members],
+        "thread_members": [describe(member) for member in thread_members]
+    }
+
+@router.get("/{email_id}/similar")
+async def get_similar_emails(email_id: int, k: int = 5, db: Session = Depends(get_db)):
+    """Get previously resolved tickets similar to this email"""
+    email = db.query(Email).filter(Email.id == email_id).first()
+    if not email:
+        raise HTTPException(status_code=404, detail="Email not found")
+    
+    return {
+        "email_id": email_id,
+        "similar": similarity_service.get_similar_tickets(db, email, k=k)
+    }
+
+@router.get("/{email_id}/attachments")
+async def get_email_attachments(email_id: int, db: Session = Depends(get_db)):
+    """List attachment metadata for an email"""
+    attachments = attachment_service.list_for_email(db, email_id)
+    return [attachment_service.to_dict(attachment) for attachment in attachments]
+
+@router.get("/attachments/{attachment_id}/download")
+async def download_attachment(attachment_id: int, db: Session = Depends(get_db)):
+    """Stream an attachment's content from the blob store"""
+    attachment = attachment_service.get(db, attachment_id)
+    if not attachment or not attachment_service.blob_store.exists(attachment.sha256):
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    
+    return StreamingResponse(
+        attachment_service.blob_store.iter_chunks(attachment.sha256),
+        media_type=attachment.content_type,
+        headers={
+            "Content-Disposition": content_disposition(attachment.filename),
+            "Content-Length": str(attachment.size),
+            "ETag": f'"{attachment.sha256}"'
+        }
+    )
+
 @router.post("/fetch")
 async def fetch_new_emails(
     background_tasks: BackgroundTasks,
@@ -88,106 +276,316 @@ async def fetch_and_process_emails(days_back: int, db: Session):
         # Fetch emails from server
         raw_emails = email_service.fetch_support_emails(days_back)
         
-        processed_count = 0
+        pending_writes = []
+        stored_emails = []
+        seen = set()
         for raw_email in raw_emails:
-            # Check if email already exists
-            existing_email = db.query(Email).filter(
-                and_(
-                    Email.sender_email == raw_email['sender_email'],
-                    Email.subject == raw_email['subject'],
-                    Email.received_at == raw_email['received_at']
-                )
-            ).first()
+            # The server can return the same message twice in one fetch
+            key = (raw_email['sender_email'], raw_email['subject'], raw_email['received_at'])
+            if key in seen:
+                continue
+            seen.add(key)
             
-            if existing_email:
+            # Check if email already exists
+            if _find_existing(db, raw_email):
                 continue
             
-            # Analyze email with AI
+            # Analyze email with AI (outside any write transaction)
             analysis = ai_service.analyze_email(raw_email)
             
-            # Create email record
-            email_record = Email(
-                sender_email=raw_email['sender_email'],
-                subject=raw_email['subject'],
-                body=raw_email['body'],
-                received_at=raw_email['received_at'],
-                sentiment=analysis['sentiment'],
-                sentiment_score=analysis['sentiment_score'],
-                priority=analysis['priority'],
-                category=analysis['category'],
-                contact_details=json.dumps(analysis['contact_details']),
-                requirements=json.dumps(analysis['requirements']),
-                sentiment_indicators=json.dumps(analysis['sentiment_indicators']),
-                processed=False
-            )
-            
-            db.add(email_record)
+            # Stored by the writer thread, batched with other pending writes
+            pending_writes.append(write_queue.run(
+                lambda write_db, raw_email=raw_email, analysis=analysis: _store_email(write_db, raw_email, analysis)
+            ))
+            stored_emails.append((raw_email, analysis))
+        
+        results = await asyncio.gather(*pending_writes, return_exceptions=True)
+        processed_count = 0
+        for (raw_email, analysis), result in zip(stored_emails, results):
+            if isinstance(result, Exception):
+                logger.error("Error storing fetched email: %s", result)
+                continue
+            if result is None:
+                # Stored by a concurrent fetch after our check
+                continue
             processed_count += 1
+            # Optional speculative draft, so it is ready when an agent opens the ticket
+            draft_service.enqueue(result, analysis['priority'], raw_email['received_at'])
         
-        db.commit()
-        print(f"Processed {processed_count} new emails")
+        if processed_count:
+            dashboard_cache.invalidate()
+        logger.info("Processed %d new emails", processed_count)
         
     except Exception as e:
-        print(f"Error in fetch_and_process_emails: {e}")
+        logger.error("Error in fetch_and_process_emails: %s", e)
         db.rollback()
 
-@router.post("/{email_id}/generate-response")
-async def generate_response(
-    email_id: int,
-    request: GenerateResponseRequest,
-    db: Session = Depends(get_db)
-):
-    """Generate AI response for an email"""
-    email = db.query(Email).filter(Email.id == email_id).first()
-    if not email:
-        raise HTTPException(status_code=404, detail="Email not found")
+def _find_existing(db: Session, raw_email: Dict[str, Any]) -> Optional[Email]:
+    """Stored email with the same sender, subject and receipt time, if any"""
+    return db.query(Email).filter(
+        and_(
+            Email.sender_email == raw_email['sender_email'],
+            Email.subject == raw_email['subject'],
+            Email.received_at == raw_email['received_at']
+        )
+    ).first()
+
+def _store_email(db: Session, raw_email: Dict[str, Any], analysis: Dict[str, Any]) -> Optional[int]:
+    """Write job: insert an analyzed email with its side-table rows; returns the new id (None if already stored)"""
+    # Checked again in the writer, which serialises every insert
+    if _find_existing(db, raw_email):
+        return None
     
+    email_record = Email(
+        sender_email=raw_email['sender_email'],
+        subject=raw_email['subject'],
+        body=raw_email['body'],
+        received_at=raw_email['received_at'],
+        sentiment=analysis['sentiment'],
+        sentiment_score=analysis['sentiment_score'],
+        priority=analysis['priority'],
+        category=analysis['category'],
+        processed=False
+    )
+    
+    db.add(email_record)
+    db.flush()
+    analysis_store.save(db, email_record, analysis)
+    attachment_service.save(db, email_record, raw_email.get('attachments', []))
+    
+    # Group near-duplicates and replies into clusters
+    clustering_service.assign(db, email_record, raw_email)
+    customer_profile_service.record_ingest(db, email_record)
+    queue_service.upsert(db, email_record)
+    return email_record.id
+
+def _update_status(email_id: int, **changes):
+    """Write job factory: apply field changes to one email and refresh its profile and queue entry.
+
+    The job returns False when the email does not exist.
+    """
+    def job(db: Session) -> bool:
+        email = db.query(Email).filter(Email.id == email_id).first()
+        if not email:
+            return False
+        before = customer_profile_service.state(email)
+        for field, value in changes.items():
+            setattr(email, field, value)
+        email.updated_at = datetime.utcnow()
+        customer_profile_service.record_change(db, email, before)
+        queue_service.upsert(db, email)
+        return True
+    return job
+
+def _sync_similarity_index(db: Session, sent_ids: List[int], unsent_ids: List[int]):
+    """Index tickets a change marked as sent and drop the ones it reopened"""
+    similarity_service.remove_many(unsent_ids)
+    if sent_ids:
+        for email in db.query(Email).filter(Email.id.in_(sent_ids), Email.ai_response.isnot(None)).all():
+            similarity_service.add(email)
+
+@router.post("/bulk/update")
+async def bulk_update_emails(request: BulkUpdateRequest, db: Session = Depends(get_db)):
+    """Update processed/response_sent/ai_response on many emails: {"ids": [...] or "filters": {...}, "changes": {...}}"""
+    changes = request.changes.model_dump(exclude_none=True)
     try:
-        # Prepare email data for AI
-        email_data = {
-            'sender_email': email.sender_email,
-            'subject': email.subject,
-            'body': email.body,
-            'received_at': email.received_at
-        }
-        
-        # Prepare analysis data
-        analysis = {
-            'sentiment': email.sentiment,
-            'sentiment_score': email.sentiment_score,
-            'priority': email.priority,
-            'category': email.category,
-            'requirements': json.loads(email.requirements) if email.requirements else [],
-            'sentiment_indicators': json.loads(email.sentiment_indicators) if email.sentiment_indicators else []
-        }
+        condition = bulk_email_service.build_condition(request.ids, request.filters)
+        updated, sent_ids, unsent_ids = await write_queue.run(
+            lambda write_db: bulk_email_service.update(write_db, condition, changes)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if changes.get("processed") or changes.get("response_sent") or changes.get("ai_response"):
+        draft_service.cancel(request.ids or [])
+    await run_in_threadpool(_sync_similarity_index, db, sent_ids, unsent_ids)
+    if updated:
+        dashboard_cache.invalidate()
+    
+    return {"updated": updated}
+
+@router.post("/bulk/mark-processed")
+async def bulk_mark_processed(request: BulkSelection, db: Session = Depends(get_db)):
+    """Mark many emails as processed: {"ids": [...]} or {"filters": {...}}"""
+    try:
+        condition = bulk_email_service.build_condition(request.ids, request.filters)
+        updated, _, _ = await write_queue.run(
+            lambda write_db: bulk_email_service.update(write_db, condition, {"processed": True})
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Filter-based changes are caught when the queued draft's email is re-checked
+    draft_service.cancel(request.ids or [])
+    
+    if updated:
+        dashboard_cache.invalidate()
+    
+    return {"updated": updated}
+
+@router.post("/bulk/delete")
+async def bulk_delete_emails(request: BulkSelection):
+    """Delete many emails: {"ids": [...]} or {"filters": {...}}"""
+    try:
+        condition = bulk_email_service.build_condition(request.ids, request.filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Committed by the single writer, like the other bulk changes
+    deleted, indexed_ids = await write_queue.run(lambda write_db: bulk_email_service.delete(write_db, condition))
+    draft_service.cancel(request.ids or [])
+    await run_in_threadpool(similarity_service.remove_many, indexed_ids)
+    if deleted:
+        dashboard_cache.invalidate()
+    
+    return {"deleted": deleted}
+
+async def _idempotent(db: Session, idempotency_key: Optional[str], scope: str, params: Dict[str, Any],
+                      handler: Callable[[], Awaitable[Any]]) -> Any:
+    """Run handler once per Idempotency-Key; repeats replay the recorded successful response.
+    
+    The key is bound to the endpoint scope and the request parameters, so
+    reusing it for a different request is rejected instead of replayed.
+    """
+    if not idempotency_key:
+        return await handler()
+    
+    scope = idempotency_service.fingerprint(scope, params)
+    try:
+        existing = idempotency_service.reserve(db, idempotency_key, scope)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if existing is not None:
+        if existing.scope != scope:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        if existing.status_code is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        return FastJSONResponse(
+            idempotency_service.replay(existing),
+            status_code=existing.status_code,
+            headers={"Idempotent-Replayed": "true"}
+        )
+    
+    try:
+        result = await handler()
+    except BaseException:
+        # Failed attempts are not recorded, so the client can retry with the same key
+        idempotency_service.release(db, idempotency_key)
+        raise
+    
+    idempotency_service.complete(db, idempotency_key, 200, result)
+    return result
+
+def _save_draft(email_id: int, ai_response: str, usage: Dict[str, Any] = None):
+    """Write job factory: store a draft (and its token usage)"""
+    def job(db: Session) -> bool:
+        if usage:
+            usage_service.record(db, email_id, usage)
+        return bool(db.query(Email).filter(Email.id == email_id).update(
+            {"ai_response": ai_response}, synchronize_session=False
+        ))
+    return job
+
+def _generate_draft(email_id: int, custom_context: Optional[str], reuse_cluster_draft: bool) -> Dict[str, Any]:
+    """Generate (or reuse) and store a draft; runs in the threadpool with its own session"""
+    db = SessionLocal()
+    try:
+        email = db.query(Email).filter(Email.id == email_id).first()
+        if not email:
+            raise HTTPException(status_code=404, detail="Email not found")
         
-        # Add custom context if provided
-        if request.custom_context:
-            analysis['custom_context'] = request.custom_context
+        # Reuse a draft already written for a near-duplicate in the same cluster
+        if reuse_cluster_draft and not custom_context:
+            cluster_draft = clustering_service.find_cluster_draft(db, email_id)
+            if cluster_draft:
+                write_queue.submit(_save_draft(email_id, cluster_draft.ai_response)).result()
+                draft_service.cancel([email_id])
+                dashboard_cache.invalidate()
+                
+                return {
+                    "email_id": email_id,
+                    "ai_response": cluster_draft.ai_response,
+                    "reused_from_email_id": cluster_draft.id,
+                    "message": "Response reused from cluster"
+                }
         
-        # Generate response
-        ai_response = ai_service.generate_response(email_data, analysis)
+        # Email data, stored analysis and similar resolved tickets for the prompt
+        email_data, analysis = draft_service.generation_inputs(db, email, custom_context)
+    finally:
+        db.close()
+    
+    try:
+        # Generate response (a template stand-in if the LLM is down or misses its deadline)
+        late_response_saver = draft_service.late_response_saver(email_id)
+        ai_response, usage = ai_service.generate_response_with_usage(
+            email_data, analysis, on_late_response=late_response_saver
+        )
         
         # Update email record
-        email.ai_response = ai_response
-        db.commit()
+        write_queue.submit(_save_draft(email_id, ai_response, usage)).result()
+        late_response_saver.template_saved()
+        draft_service.cancel([email_id])
+        dashboard_cache.invalidate()
         
-        return {
+        result = {
             "email_id": email_id,
             "ai_response": ai_response,
             "message": "Response generated successfully"
         }
+        if usage.get('fallback') == "deadline":
+            result["message"] = "Template response returned; the AI draft will replace it when it arrives"
+        elif usage.get('fallback'):
+            result["message"] = "AI service unavailable; template response generated"
+        return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
-@router.post("/{email_id}/send-response")
-async def send_response(
+@router.post("/{email_id}/generate-response")
+async def generate_response(
     email_id: int,
-    custom_response: str = None,
+    request: GenerateResponseRequest,
+    reuse_cluster_draft: bool = True,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: Session = Depends(get_db)
 ):
-    """Send response email"""
+    """Generate AI response for an email"""
+    # Identical concurrent requests (e.g. a double click) share one generation
+    params = {"custom_context": request.custom_context or "", "reuse_cluster_draft": reuse_cluster_draft}
+    return await _idempotent(db, idempotency_key, f"generate-response:{email_id}", params, lambda: generation_flights.run(
+        (email_id, request.custom_context or "", reuse_cluster_draft),
+        lambda: _generate_draft(email_id, request.custom_context, reuse_cluster_draft)
+    ))
+
+def _claim_send(email_id: int):
+    """Write job factory: atomically flip response_sent; False if it was already set"""
+    def job(db: Session) -> bool:
+        claimed = bool(db.query(Email).filter(
+            Email.id == email_id,
+            Email.response_sent == False
+        ).update({"response_sent": True, "response_sent_at": datetime.utcnow()}, synchronize_session=False))
+        if claimed:
+            email = db.query(Email).populate_existing().filter(Email.id == email_id).first()
+            # Before the claim the email was unanswered, and open unless already processed
+            customer_profile_service.record_change(db, email, (not email.processed, None))
+        return claimed
+    return job
+
+def _release_send(email_id: int):
+    """Write job factory: undo a send claim after the SMTP send failed"""
+    def job(db: Session) -> bool:
+        email = db.query(Email).filter(Email.id == email_id).first()
+        if not email:
+            return False
+        before = customer_profile_service.state(email)
+        email.response_sent = False
+        email.response_sent_at = None
+        customer_profile_service.record_change(db, email, before)
+        return True
+    return job
+
+async def _send_response(email_id: int, custom_response: Optional[str], db: Session) -> Dict[str, Any]:
     email = db.query(Email).filter(Email.id == email_id).first()
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
@@ -195,38 +593,60 @@ async def send_response(
     if email.response_sent:
         raise HTTPException(status_code=400, detail="Response already sent for this email")
     
+    # Use custom response or AI-generated response
+    response_body = custom_response or email.ai_response
+    
+    if not response_body:
+        raise HTTPException(status_code=400, detail="No response available to send")
+    
+    # Claim the send in the database first: of concurrent requests only one gets past here
+    if not await write_queue.run(_claim_send(email_id)):
+        raise HTTPException(status_code=400, detail="Response already sent for this email")
+    
     try:
-        # Use custom response or AI-generated response
-        response_body = custom_response or email.ai_response
-        
-        if not response_body:
-            raise HTTPException(status_code=400, detail="No response available to send")
-        
         # Send email
-        success = email_service.send_response_email(
+        success = await run_in_threadpool(
+            email_service.send_response_email,
             email.sender_email,
             email.subject,
             response_body
         )
-        
-        if success:
-            # Update email record
-            email.response_sent = True
-            email.response_sent_at = datetime.utcnow()
-            email.processed = True
-            if custom_response:
-                email.ai_response = custom_response
-            db.commit()
-            
-            return {
-                "email_id": email_id,
-                "message": "Response sent successfully"
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
-            
+        error = "Failed to send email"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error sending response: {str(e)}")
+        success = False
+        error = f"Error sending response: {str(e)}"
+    
+    if not success:
+        await write_queue.run(_release_send(email_id))
+        raise HTTPException(status_code=500, detail=error)
+    
+    # Update email record
+    changes = {"processed": True}
+    if custom_response:
+        changes["ai_response"] = custom_response
+    await write_queue.run(_update_status(email_id, **changes))
+    draft_service.cancel([email_id])
+    dashboard_cache.invalidate()
+    # Memmap and file-lock I/O: keep it off the event loop
+    await run_in_threadpool(similarity_service.add, email)
+    
+    return {
+        "email_id": email_id,
+        "message": "Response sent successfully"
+    }
+
+@router.post("/{email_id}/send-response")
+async def send_response(
+    email_id: int,
+    custom_response: str = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    """Send response email"""
+    return await _idempotent(
+        db, idempotency_key, f"send-response:{email_id}", {"custom_response": custom_response or ""},
+        lambda: _send_response(email_id, custom_response, db)
+    )
 
 @router.put("/{email_id}", response_model=EmailResponse)
 async def update_email(
@@ -240,18 +660,27 @@ async def update_email(
         raise HTTPException(status_code=404, detail="Email not found")
     
     # Update fields
+    changes = {}
     if email_update.ai_response is not None:
-        email.ai_response = email_update.ai_response
+        changes["ai_response"] = email_update.ai_response
     if email_update.response_sent is not None:
-        email.response_sent = email_update.response_sent
+        changes["response_sent"] = email_update.response_sent
         if email_update.response_sent:
-            email.response_sent_at = datetime.utcnow()
+            changes["response_sent_at"] = datetime.utcnow()
     if email_update.processed is not None:
-        email.processed = email_update.processed
+        changes["processed"] = email_update.processed
     
-    email.updated_at = datetime.utcnow()
-    db.commit()
+    if not await write_queue.run(_update_status(email_id, **changes)):
+        raise HTTPException(status_code=404, detail="Email not found")
+    if changes.get("processed") or changes.get("response_sent") or changes.get("ai_response"):
+        draft_service.cancel([email_id])
     db.refresh(email)
+    dashboard_cache.invalidate()
+    # Keep the index of resolved tickets in step with response_sent
+    if "response_sent" in changes:
+        sent_ids = [email_id] if email.response_sent else []
+        unsent_ids = [] if email.response_sent else [email_id]
+        await run_in_threadpool(_sync_similarity_index, db, sent_ids, unsent_ids)
     
     return email
 
@@ -262,20 +691,26 @@ async def delete_email(email_id: int, db: Session = Depends(get_db)):
     if not email:
         raise HTTPException(status_code=404, detail="Email not found")
     
+    clustering_service.forget(db, email_id)
+    queue_service.remove(db, email_id)
+    analysis_store.clear(db, email_id)
+    attachment_service.delete_for_email(db, email_id)
     db.delete(email)
+    customer_profile_service.refresh(db, [email.sender_email])
     db.commit()
+    draft_service.cancel([email_id])
+    await run_in_threadpool(similarity_service.remove, email_id)
+    dashboard_cache.invalidate()
     
     return {"message": "Email deleted successfully"}
 
 @router.post("/{email_id}/mark-processed")
 async def mark_email_processed(email_id: int, db: Session = Depends(get_db)):
     """Mark email as processed"""
-    email = db.query(Email).filter(Email.id == email_id).first()
-    if not email:
+    if not await write_queue.run(_update_status(email_id, processed=True)):
         raise HTTPException(status_code=404, detail="Email not found")
+    draft_service.cancel([email_id])
     
-    email.processed = True
-    email.updated_at = datetime.utcnow()
-    db.commit()
+    dashboard_cache.invalidate()
     
     return {"message": "Email marked as processed"}
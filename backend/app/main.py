@@ -1,29 +1,80 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+import time
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 import os
 from dotenv import load_dotenv
 
-from app.models.database import get_db, create_tables, Email, EmailStats
+from app.models.database import get_db, create_tables, engine, SessionLocal, Email, EmailStats
 from app.models.schemas import (
     EmailResponse, EmailCreate, EmailUpdate, DashboardStats, 
     GenerateResponseRequest, EmailAnalysis
 )
 from app.services.email_service import EmailService
 from app.services.ai_service import AIService
-from app.api.email_routes import router as email_router
+from app.services.search_service import SearchService
+from app.services.change_log_service import ChangeLogService
+from app.services.similarity_service import similarity_service
+from app.services.queue_service import QueueService
+from app.services.customer_profile_service import customer_profile_service
+from app.services.cache_service import dashboard_cache
+from app.services.write_queue import write_queue
+from app.api.email_routes import router as email_router, draft_service
 from app.api.dashboard_routes import router as dashboard_router
+from app.utils.serialization import FastJSONResponse
+from app.utils.logging_config import configure_logging
+from app.utils.profiling import request_profiler
+from app.utils.sqlite_tuning import configure_sqlite
+from app.utils.metrics import metrics, instrument_engine, track_queries, request_duration, request_queries
 
 load_dotenv()
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Query counts and timings for /metrics
+instrument_engine(engine)
+
+# WAL journal, relaxed fsync, larger page cache and mmap on every SQLite connection
+configure_sqlite(engine)
+
 # Create tables
 create_tables()
 
+# Full-text index over email subjects and bodies
+SearchService().ensure_index(engine)
+
+# Change log behind the delta sync endpoint
+ChangeLogService().ensure_tracking(engine)
+
+# Vector index of resolved tickets for similar-ticket retrieval
+_startup_db = SessionLocal()
+try:
+    similarity_service.ensure_built(_startup_db)
+    # Profiles first: queue ranks read them
+    customer_profile_service.ensure_built(_startup_db)
+    QueueService().ensure_built(_startup_db)
+finally:
+    _startup_db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await draft_service.stop()
+    # Commit whatever the writer thread still holds before the process exits
+    write_queue.stop()
+
 app = FastAPI(
     title="AI-Powered Communication Assistant",
     description="Intelligent email management system with AI-powered analysis and response generation",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -35,10 +86,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression (opt-in): COMPRESSION=gzip|br
+compression = os.getenv("COMPRESSION", "off").lower()
+compression_min_size = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+if compression == "br":
+    try:
+        # brotli-asgi negotiates br and falls back to gzip for other clients
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, minimum_size=compression_min_size)
+    except ImportError:
+        logger.warning("brotli-asgi is not installed, falling back to gzip compression")
+        compression = "gzip"
+
+if compression == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=compression_min_size)
+
+def _route_label(request: Request) -> str:
+    """Route template of a request (e.g. /api/emails/{email_id}), to keep label cardinality bounded"""
+    if request.scope.get("route") is None:
+        return "unmatched"
+    path_params = {str(value): name for name, value in (request.scope.get("path_params") or {}).items()}
+    return "/".join(
+        "{" + path_params[segment] + "}" if segment in path_params else segment
+        for segment in request.url.path.split("/")
+    )
+
+# Opt-in profiling of single requests (see RequestProfiler); registered first so
+# the metrics middleware below stays the outermost layer
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    mode = request_profiler.requested_mode(request)
+    if mode is None:
+        return await call_next(request)
+    return await request_profiler.profile(request, call_next, mode)
+
+# Request latency and per-request query counts
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    with track_queries() as queries:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            route = _route_label(request)
+            request_duration.observe(elapsed, method=request.method, route=route, status=status)
+            request_queries.observe(queries.count, route=route)
+            logger.info("request", extra={
+                "method": request.method,
+                "route": route,
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 2),
+                "db_queries": queries.count,
+                "db_ms": round(queries.seconds * 1000, 2)
+            })
+
 # Include routers
 app.include_router(email_router, prefix="/api/emails", tags=["emails"])
 app.include_router(dashboard_router, prefix="/api/dashboard", tags=["dashboard"])
 
+metrics.gauge(
+    "similarity_index_tickets", "Resolved tickets in the similar-ticket vector index", (),
+    lambda: {(): similarity_service.count}
+)
+metrics.gauge(
+    "dashboard_cache_entries", "Entries held in the in-process dashboard cache", (),
+    lambda: {(): dashboard_cache.size()}
+)
+metrics.gauge(
+    "db_write_queue_pending", "Write jobs waiting for the single writer thread", (),
+    lambda: {(): write_queue.pending()}
+)
+
 # Initialize services
 email_service = EmailService()
 ai_service = AIService()
@@ -51,6 +174,15 @@ async def root():
         "status": "running"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, database and pipeline metrics (of this worker process only)"""
+    # Under serve.py each worker answers with its own counters; the pid tells scrapes apart
+    return PlainTextResponse(
+        f"# Metrics of worker process {os.getpid()}\n" + metrics.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
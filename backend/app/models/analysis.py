@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey
+
+from app.models.database import Base, Email
+
+class EmailRequirement(Base):
+    """A customer requirement extracted from an email"""
+    __tablename__ = "email_requirements"
+
+    id = Column(Integer, primary_key=True)
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), index=True, nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    requirement = Column(Text, nullable=False)
+
+class EmailSentimentIndicator(Base):
+    """A sentiment-bearing word or phrase found in an email"""
+    __tablename__ = "email_sentiment_indicators"
+
+    id = Column(Integer, primary_key=True)
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), index=True, nullable=False)
+    indicator = Column(String, index=True, nullable=False)
+
+class EmailContactDetail(Base):
+    """A contact detail extracted from an email (primary_email, phone or email)"""
+    __tablename__ = "email_contact_details"
+
+    id = Column(Integer, primary_key=True)
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), index=True, nullable=False)
+    kind = Column(String, nullable=False)
+    value = Column(String, index=True, nullable=False)
@@ -0,0 +1,36 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Table, event, func, select
+
+from app.models.database import Base, Email
+
+# Same columns as the emails table, so rows move across with INSERT ... SELECT
+archived_emails_table = Table(
+    "archived_emails",
+    Base.metadata,
+    *[Column(column.name, column.type, primary_key=column.primary_key) for column in Email.__table__.columns],
+    Column("archived_at", DateTime, default=datetime.utcnow, nullable=False),
+    Index("ix_archived_emails_received_at", "received_at"),
+    Index("ix_archived_emails_sender_email", "sender_email")
+)
+
+class ArchivedEmail(Base):
+    """Processed email moved out of the hot emails table by the archival job"""
+    __table__ = archived_emails_table
+
+@event.listens_for(Email, "before_insert")
+def _keep_ids_above_archive(mapper, connection, target):
+    """Never let SQLite reuse an id that an archived email still holds.
+
+    Without AUTOINCREMENT, SQLite hands out max(emails.id) + 1. Once the
+    newest hot rows are archived or deleted, that falls back into the
+    archived id range, and GET /{id} could then return the wrong email.
+    In that case the id is assigned explicitly above both tables.
+    """
+    if target.id is not None:
+        return
+    archived_max = connection.execute(select(func.max(archived_emails_table.c.id))).scalar()
+    if archived_max is None:
+        return
+    hot_max = connection.execute(select(func.max(Email.__table__.c.id))).scalar() or 0
+    if hot_max <= archived_max:
+        target.id = archived_max + 1
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+
+from app.models.database import Base, Email
+
+class EmailAttachment(Base):
+    """Attachment metadata; the content lives in the blob store under sha256"""
+    __tablename__ = "email_attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), index=True, nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), index=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
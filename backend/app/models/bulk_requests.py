@@ -0,0 +1,21 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class BulkFilters(BaseModel):
+    """Same filters as the email list; processed_filter accepts JSON booleans and "true"/"false" """
+    priority_filter: Optional[str] = None
+    sentiment_filter: Optional[str] = None
+    processed_filter: Optional[bool] = None
+
+class BulkSelection(BaseModel):
+    """Emails a bulk operation applies to: explicit ids, list filters, or both"""
+    ids: Optional[List[int]] = None
+    filters: Optional[BulkFilters] = None
+
+class BulkChanges(BaseModel):
+    processed: Optional[bool] = None
+    response_sent: Optional[bool] = None
+    ai_response: Optional[str] = None
+
+class BulkUpdateRequest(BulkSelection):
+    changes: BulkChanges = BulkChanges()
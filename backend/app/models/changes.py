@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+
+from app.models.database import Base
+
+class EmailChange(Base):
+    """Append-only change log of the emails table; the version is the sync token"""
+    __tablename__ = "email_changes"
+    # AUTOINCREMENT so versions are never reused after pruning
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    version = Column(Integer, primary_key=True, autoincrement=True)
+    email_id = Column(Integer, index=True, nullable=False)
+    op = Column(String, nullable=False)  # upsert | delete
+    changed_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, ForeignKey, Index
+
+from app.models.database import Base, Email
+
+class EmailCluster(Base):
+    """Near-duplicate cluster and reply-thread membership for an email"""
+    __tablename__ = "email_clusters"
+
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), primary_key=True)
+    cluster_id = Column(Integer, index=True, nullable=False)
+    thread_id = Column(String, index=True)
+    message_id = Column(String, index=True)
+    in_reply_to = Column(String)
+    reference_ids = Column(Text)
+    signature = Column(LargeBinary)
+
+class EmailLSHBucket(Base):
+    """One LSH band bucket of an email's MinHash signature"""
+    __tablename__ = "email_lsh_buckets"
+
+    id = Column(Integer, primary_key=True)
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), index=True, nullable=False)
+    band = Column(Integer, nullable=False)
+    bucket = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_email_lsh_buckets_band_bucket", "band", "bucket"),
+    )
@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from app.models.database import Base
+
+class CustomerProfile(Base):
+    """Running per-sender totals over the sender's tickets, hot and archived.
+
+    Maintained incrementally as emails are ingested and answered, and
+    recomputed per sender after set-based changes and deletes.
+    """
+    __tablename__ = "customer_profiles"
+
+    sender_email = Column(String, primary_key=True)
+    ticket_count = Column(Integer, nullable=False, default=0)
+    open_tickets = Column(Integer, nullable=False, default=0)
+    # Sum and count of received -> response sent times, for the average
+    responded_count = Column(Integer, nullable=False, default=0)
+    total_response_seconds = Column(Float, nullable=False, default=0.0)
+    last_sentiment = Column(String)
+    last_received_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
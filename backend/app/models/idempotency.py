@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime
+
+from app.models.database import Base
+
+class IdempotencyKey(Base):
+    """Client-supplied Idempotency-Key and the response first returned for it"""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    scope = Column(String, nullable=False)  # endpoint and request digest, e.g. send-response:42:3f2a...
+    status_code = Column(Integer)  # NULL while the first request is still running
+    response = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+
+from app.models.database import Base, Email
+
+class EmailQueueEntry(Base):
+    """Work-queue position of an open email; lower queue_rank is served first"""
+    __tablename__ = "email_queue"
+
+    email_id = Column(Integer, ForeignKey(f"{Email.__tablename__}.id", ondelete="CASCADE"), primary_key=True)
+    # Effective due time in epoch seconds; time-invariant, so it only changes when the email does
+    queue_rank = Column(Float, index=True, nullable=False)
+    urgency_score = Column(Float, nullable=False)
+    sla_deadline = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
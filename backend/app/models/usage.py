@@ -0,0 +1,22 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from app.models.database import Base
+
+class LLMUsage(Base):
+    """Token usage and latency of one response generation.
+
+    Kept as a ledger: rows are not removed with their email, so cost
+    reports still cover deleted and archived tickets.
+    """
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True)
+    email_id = Column(Integer, index=True, nullable=False)
+    source = Column(String, nullable=False)  # llm or template
+    model = Column(String)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    prompt_truncated_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Float, nullable=False, default=0.0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
@@ -0,0 +1,114 @@
+import logging
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+def default_cache_path() -> str:
+    """Place the cache next to the SQLite database, or in the working directory otherwise"""
+    explicit = os.getenv("ANALYSIS_CACHE_PATH")
+    if explicit:
+        return explicit
+
+    database_url = os.getenv("DATABASE_URL", "sqlite:///./emails.db")
+    if database_url.startswith("sqlite:///"):
+        db_path = database_url[len("sqlite:///"):]
+        return os.path.join(os.path.dirname(db_path) or ".", "analysis_cache.db")
+    return "./analysis_cache.db"
+
+class AnalysisCache:
+    """Persistent, size-bounded cache of analysis results keyed by content hash"""
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or default_cache_path()
+        self.max_entries = max_entries or int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "100000"))
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._open()
+
+    def _open(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_analysis_cache_last_used ON analysis_cache (last_used)"
+        )
+        self._conn.commit()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        """SQLite connections must not cross fork(); preloaded server workers reopen their own"""
+        if self._pid != os.getpid():
+            self._open()
+
+    @staticmethod
+    def make_key(analyzer_version: str, subject: str, body: str) -> str:
+        digest = hashlib.sha256()
+        for part in (analyzer_version, subject or "", body or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._lock:
+                self._check_fork()
+                row = self._conn.execute(
+                    "SELECT value FROM analysis_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE analysis_cache SET last_used = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+            return json.loads(row[0])
+        except Exception as e:
+            logger.error("Error reading analysis cache: %s", e)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        try:
+            with self._lock:
+                self._check_fork()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, value, last_used) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time())
+                )
+                self._writes_since_prune += 1
+                # Check the size bound periodically rather than on every write
+                if self._writes_since_prune >= 1000:
+                    self._prune()
+                self._conn.commit()
+        except Exception as e:
+            logger.error("Error writing analysis cache: %s", e)
+
+    def _prune(self):
+        """Evict least recently used entries beyond max_entries"""
+        self._writes_since_prune = 0
+        count = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                "SELECT key FROM analysis_cache ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._check_fork()
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
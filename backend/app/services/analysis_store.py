@@ -0,0 +1,86 @@
+import json
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+
+from app.models.database import Email
+from app.models.analysis import EmailRequirement, EmailSentimentIndicator, EmailContactDetail
+from app.utils.helpers import parse_analysis_field
+
+class AnalysisStore:
+    """Persist analysis results as indexed child rows alongside the Email JSON columns"""
+
+    def _contact_rows(self, contact_details: Dict[str, Any]) -> List[tuple]:
+        rows = []
+        if contact_details.get('primary_email'):
+            rows.append(('primary_email', contact_details['primary_email']))
+        for phone in contact_details.get('extracted_phones') or contact_details.get('phone_numbers') or []:
+            rows.append(('phone', phone))
+        for address in contact_details.get('extracted_emails') or contact_details.get('alternate_emails') or []:
+            rows.append(('email', address))
+        return rows
+
+    def save(self, db: Session, email: Email, analysis: Dict[str, Any]):
+        """Write analysis to the Email columns and child tables (email must be flushed)"""
+        requirements = analysis.get('requirements') or []
+        sentiment_indicators = analysis.get('sentiment_indicators') or []
+        contact_details = analysis.get('contact_details') or {}
+
+        # Keep the JSON columns for API compatibility
+        email.requirements = json.dumps(requirements)
+        email.sentiment_indicators = json.dumps(sentiment_indicators)
+        email.contact_details = json.dumps(contact_details)
+
+        self.clear(db, email.id)
+        db.add_all([
+            EmailRequirement(email_id=email.id, position=position, requirement=requirement)
+            for position, requirement in enumerate(requirements)
+        ])
+        db.add_all([
+            EmailSentimentIndicator(email_id=email.id, indicator=indicator)
+            for indicator in sentiment_indicators
+        ])
+        db.add_all([
+            EmailContactDetail(email_id=email.id, kind=kind, value=value)
+            for kind, value in self._contact_rows(contact_details)
+        ])
+
+    def clear(self, db: Session, email_id: int):
+        self.clear_many(db, [email_id])
+
+    def clear_many(self, db: Session, email_ids):
+        """Delete the analysis rows of several emails (a list of ids or an id subquery)"""
+        for model in (EmailRequirement, EmailSentimentIndicator, EmailContactDetail):
+            db.query(model).filter(model.email_id.in_(email_ids)).delete(synchronize_session=False)
+
+    def load(self, db: Session, email: Email) -> Dict[str, List[str]]:
+        """Requirements and sentiment indicators for an email, without parsing JSON"""
+        requirements = [
+            row.requirement for row in db.query(EmailRequirement.requirement).filter(
+                EmailRequirement.email_id == email.id
+            ).order_by(EmailRequirement.position)
+        ]
+        sentiment_indicators = [
+            row.indicator for row in db.query(EmailSentimentIndicator.indicator).filter(
+                EmailSentimentIndicator.email_id == email.id
+            )
+        ]
+
+        # Rows written before the child tables existed and not yet migrated
+        if not requirements and email.requirements not in (None, "", "[]"):
+            requirements = parse_analysis_field(email.requirements, [])
+        if not sentiment_indicators and email.sentiment_indicators not in (None, "", "[]"):
+            sentiment_indicators = parse_analysis_field(email.sentiment_indicators, [])
+
+        return {
+            'requirements': requirements,
+            'sentiment_indicators': sentiment_indicators
+        }
+
+    def migrate_email(self, db: Session, email: Email):
+        """Repair repr-encoded columns and populate child rows for one stored email"""
+        analysis = {
+            'requirements': parse_analysis_field(email.requirements, []),
+            'sentiment_indicators': parse_analysis_field(email.sentiment_indicators, []),
+            'contact_details': parse_analysis_field(email.contact_details, {})
+        }
+        self.save(db, email, analysis)
@@ -0,0 +1,76 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import Email
+from app.models.archive import ArchivedEmail
+from app.models.clusters import EmailLSHBucket
+from app.models.queue import EmailQueueEntry
+
+load_dotenv()
+
+class ArchiveService:
+    """Moves old processed emails from the hot emails table into archived_emails"""
+
+    def __init__(self):
+        self.archive_after_days = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+        self.batch_size = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+        self.email_columns = [column.name for column in Email.__table__.columns]
+
+    def _candidate_ids(self, db: Session, cutoff: datetime, after_id: int, max_id: int) -> List[int]:
+        return [row.id for row in db.query(Email.id).filter(
+            and_(
+                Email.processed == True,
+                Email.received_at < cutoff,
+                Email.id > after_id,
+                # Rows inserted while the job runs wait for the next run
+                Email.id <= max_id
+            )
+        ).order_by(Email.id).limit(self.batch_size).all()]
+
+    def archive(self, db: Session, older_than_days: Optional[int] = None) -> int:
+        """Archive processed emails older than the cutoff in id batches; returns the number moved"""
+        days = self.archive_after_days if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+
+        max_id = db.query(func.max(Email.id)).scalar()
+        if max_id is None:
+            return 0
+
+        hot_columns = [getattr(Email, name) for name in self.email_columns]
+        moved = 0
+        last_id = 0
+
+        while True:
+            email_ids = self._candidate_ids(db, cutoff, last_id, max_id)
+            if not email_ids:
+                break
+
+            db.execute(
+                insert(ArchivedEmail.__table__).from_select(
+                    self.email_columns,
+                    select(*hot_columns).where(Email.id.in_(email_ids))
+                )
+            )
+            # Archived emails no longer match new arrivals or sit in the work queue
+            db.query(EmailLSHBucket).filter(EmailLSHBucket.email_id.in_(email_ids)).delete(synchronize_session=False)
+            db.query(EmailQueueEntry).filter(EmailQueueEntry.email_id.in_(email_ids)).delete(synchronize_session=False)
+            db.query(Email).filter(Email.id.in_(email_ids)).delete(synchronize_session=False)
+            db.commit()
+
+            moved += len(email_ids)
+            last_id = email_ids[-1]
+
+        return moved
+
+    def get(self, db: Session, email_id: int) -> Optional[ArchivedEmail]:
+        return db.query(ArchivedEmail).filter(ArchivedEmail.id == email_id).first()
+
+    def get_stats(self, db: Session) -> Dict[str, int]:
+        return {
+            "hot_emails": db.query(Email).count(),
+            "archived_emails": db.query(ArchivedEmail).count()
+        }
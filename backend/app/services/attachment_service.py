@@ -0,0 +1,119 @@
+import os
+import logging
+from typing import Any, Dict, Iterable, List, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import SessionLocal, Email
+from app.models.attachments import EmailAttachment
+from app.services.blob_store import BlobStore
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Session.info key: blobs that lost attachment rows in this transaction, by the service that owns them
+_ORPHANED = "attachment_blobs_orphaned"
+
+class AttachmentService:
+    """Attachment metadata in the database, content in the content-addressed blob store"""
+
+    def __init__(self):
+        self.blob_store = BlobStore()
+        # Ingest writes the blob before its rows; a blob put this recently may be about to be referenced
+        self.orphan_grace_seconds = float(os.getenv("ATTACHMENT_ORPHAN_GRACE_SECONDS", "3600"))
+
+    def save(self, db: Session, email: Email, attachments: List[Dict[str, Any]]):
+        """Record metadata for attachments already written to the blob store"""
+        db.add_all([
+            EmailAttachment(
+                email_id=email.id,
+                filename=attachment['filename'],
+                content_type=attachment['content_type'],
+                size=attachment['size'],
+                sha256=attachment['sha256']
+            )
+            for attachment in attachments
+        ])
+
+    def list_for_email(self, db: Session, email_id: int) -> List[EmailAttachment]:
+        return db.query(EmailAttachment).filter(EmailAttachment.email_id == email_id).order_by(EmailAttachment.id).all()
+
+    def get(self, db: Session, attachment_id: int) -> EmailAttachment:
+        return db.query(EmailAttachment).filter(EmailAttachment.id == attachment_id).first()
+
+    def delete_for_email(self, db: Session, email_id: int):
+        """Remove an email's attachment rows and any blobs no other email references"""
+        self.delete_for_emails(db, [email_id])
+
+    def delete_for_emails(self, db: Session, email_ids):
+        """Remove the attachment rows of several emails (ids or an id subquery) and orphaned blobs
+
+        Blobs are only deleted once the transaction commits, and only if no
+        attachment row references them by then; a rollback keeps them.
+        """
+        digests = {row.sha256 for row in db.query(EmailAttachment.sha256).filter(
+            EmailAttachment.email_id.in_(email_ids)
+        ).distinct()}
+        db.query(EmailAttachment).filter(EmailAttachment.email_id.in_(email_ids)).delete(synchronize_session=False)
+        if digests:
+            db.info.setdefault(_ORPHANED, {}).setdefault(self, set()).update(digests)
+
+    def delete_unreferenced_blobs(self, digests: Set[str]):
+        """Delete the blobs no committed attachment row references
+
+        Blobs still inside the grace period are left for sweep_orphaned_blobs.
+        """
+        db = SessionLocal()
+        try:
+            self._delete_unreferenced(db, digests)
+        except Exception as e:
+            logger.error("Error deleting orphaned attachment blobs: %s", e)
+        finally:
+            db.close()
+
+    def sweep_orphaned_blobs(self, db: Session, batch_size: int = 500) -> int:
+        """Delete every stored blob no attachment row references (run periodically); returns the count"""
+        deleted = 0
+        batch: List[str] = []
+        for digest in self.blob_store.iter_digests():
+            batch.append(digest)
+            if len(batch) >= batch_size:
+                deleted += self._delete_unreferenced(db, batch)
+                batch = []
+        if batch:
+            deleted += self._delete_unreferenced(db, batch)
+        return deleted
+
+    def _delete_unreferenced(self, db: Session, digests: Iterable[str]) -> int:
+        digests = set(digests)
+        deleted = 0
+        # The lock keeps a concurrent put from reusing a blob between the check and the unlink
+        with self.blob_store.lock():
+            referenced = {row.sha256 for row in db.query(EmailAttachment.sha256).filter(
+                EmailAttachment.sha256.in_(digests)
+            ).distinct()}
+            for digest in digests - referenced:
+                deleted += self.blob_store.delete(digest, min_age_seconds=self.orphan_grace_seconds)
+        return deleted
+
+    def to_dict(self, attachment: EmailAttachment) -> Dict[str, Any]:
+        return {
+            "id": attachment.id,
+            "email_id": attachment.email_id,
+            "filename": attachment.filename,
+            "content_type": attachment.content_type,
+            "size": attachment.size,
+            "sha256": attachment.sha256
+        }
+
+def _after_commit(session: Session):
+    for service, digests in session.info.pop(_ORPHANED, {}).items():
+        service.delete_unreferenced_blobs(digests)
+
+def _after_rollback(session: Session):
+    session.info.pop(_ORPHANED, None)
+
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
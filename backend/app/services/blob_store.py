@@ -0,0 +1,83 @@
+import os
+import mmap
+import hashlib
+import time
+import tempfile
+from typing import ContextManager, Iterator, Tuple
+from dotenv import load_dotenv
+
+from app.utils.file_lock import file_lock
+
+load_dotenv()
+
+class BlobStore:
+    """Content-addressed local file store: each blob is written once under its SHA-256"""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.getenv("BLOB_STORE_DIR", "./blobs")
+        self.chunk_size = 64 * 1024
+
+    def path_for(self, digest: str) -> str:
+        # Two levels of fan-out keep directories small
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    def put(self, data: bytes) -> Tuple[str, int]:
+        """Store data and return (sha256, size); identical content is stored only once"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        with self.lock():
+            if os.path.exists(path):
+                # Mark it as in use again so a concurrent orphan sweep leaves it alone
+                os.utime(path)
+                return digest, len(data)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        return digest, len(data)
+
+    def iter_chunks(self, digest: str) -> Iterator[bytes]:
+        """Stream a blob through a read-only memory map"""
+        path = self.path_for(digest)
+        if os.path.getsize(path) == 0:
+            return
+
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, len(mapped), self.chunk_size):
+                    yield mapped[start:start + self.chunk_size]
+
+    def iter_digests(self) -> Iterator[str]:
+        """Digests of every stored blob (temp files and the lock file are skipped)"""
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.startswith("."):
+                    yield filename
+
+    def lock(self) -> ContextManager[None]:
+        """Exclusive across processes; held by put and by orphan deletion"""
+        os.makedirs(self.root, exist_ok=True)
+        return file_lock(os.path.join(self.root, ".lock"))
+
+    def delete(self, digest: str, min_age_seconds: float = 0) -> bool:
+        """Remove a blob unless it was written or re-put within min_age_seconds; call under lock()"""
+        path = self.path_for(digest)
+        try:
+            if time.time() - os.path.getmtime(path) < min_age_seconds:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database import Email
+from app.models.bulk_requests import BulkFilters
+from app.services.queue_service import QueueService
+from app.services.clustering_service import ClusteringService
+from app.services.analysis_store import AnalysisStore
+from app.services.attachment_service import AttachmentService
+from app.services.customer_profile_service import customer_profile_service
+
+class BulkEmailService:
+    """Set-based status changes and deletes over many emails; the caller commits"""
+
+    updatable_fields = ("processed", "response_sent", "ai_response")
+
+    def __init__(self):
+        self.queue_service = QueueService()
+        self.clustering_service = ClusteringService()
+        self.analysis_store = AnalysisStore()
+        self.attachment_service = AttachmentService()
+        self.reopen_batch_size = 500
+
+    def build_condition(self, ids: Optional[List[int]] = None, filters: Optional[BulkFilters] = None):
+        """WHERE clause for explicit ids or the get_emails filters; refuses to match everything"""
+        conditions = []
+        if ids:
+            conditions.append(Email.id.in_(ids))
+
+        filters = filters or BulkFilters()
+        if filters.priority_filter:
+            conditions.append(Email.priority == filters.priority_filter)
+        if filters.sentiment_filter:
+            conditions.append(Email.sentiment == filters.sentiment_filter)
+        if filters.processed_filter is not None:
+            conditions.append(Email.processed == filters.processed_filter)
+
+        if not conditions:
+            raise ValueError("Provide ids or at least one filter")
+        return and_(*conditions)
+
+    def update(self, db: Session, condition, changes: Dict[str, Any]) -> Tuple[int, List[int], List[int]]:
+        """Apply field changes with a single UPDATE.
+
+        Returns (emails changed, ids newly marked sent, ids no longer sent) so
+        the caller can keep the vector index of resolved tickets in step.
+        """
+        values = {field: changes[field] for field in self.updatable_fields if changes.get(field) is not None}
+        if not values:
+            raise ValueError(f"Nothing to update; allowed fields: {', '.join(self.updatable_fields)}")
+
+        now = datetime.utcnow()
+        values["updated_at"] = now
+        if values.get("response_sent"):
+            values["response_sent_at"] = now
+
+        target_ids = select(Email.id).where(condition)
+        closing = values.get("processed") is True or values.get("response_sent") is True
+        reopening = values.get("processed") is False or values.get("response_sent") is False
+
+        # Resolve queue and profile effects before the UPDATE changes which rows the filter matches
+        reopened_ids = [row.id for row in db.execute(target_ids)] if reopening else []
+        sent_ids, unsent_ids = [], []
+        if values.get("response_sent") is True:
+            sent_ids = [row.id for row in db.execute(select(Email.id).where(and_(condition, Email.response_sent == False)))]
+        elif values.get("response_sent") is False:
+            unsent_ids = [row.id for row in db.execute(select(Email.id).where(and_(condition, Email.response_sent == True)))]
+        senders = customer_profile_service.senders_of(db, target_ids) if closing or reopening else []
+        if closing:
+            self.queue_service.remove_many(db, target_ids)
+
+        updated = db.execute(
+            update(Email).where(condition).values(**values).execution_options(synchronize_session=False)
+        ).rowcount
+        customer_profile_service.refresh(db, senders)
+
+        # Reopened emails need a freshly computed queue rank
+        for start in range(0, len(reopened_ids), self.reopen_batch_size):
+            batch = reopened_ids[start:start + self.reopen_batch_size]
+            for email in db.query(Email).filter(Email.id.in_(batch)).all():
+                self.queue_service.upsert(db, email)
+
+        return updated, sent_ids, unsent_ids
+
+    def delete(self, db: Session, condition) -> Tuple[int, List[int]]:
+        """Delete matching emails and their side-table rows; returns (count, ids to drop from the vector index)"""
+        target_ids = select(Email.id).where(condition)
+        indexed_ids = [row.id for row in db.execute(
+            select(Email.id).where(and_(condition, Email.response_sent == True))
+        )]
+        senders = customer_profile_service.senders_of(db, target_ids)
+
+        self.clustering_service.forget_many(db, target_ids)
+        self.queue_service.remove_many(db, target_ids)
+        self.analysis_store.clear_many(db, target_ids)
+        self.attachment_service.delete_for_emails(db, target_ids)
+
+        deleted = db.execute(
+            delete(Email).where(condition).execution_options(synchronize_session=False)
+        ).rowcount
+        customer_profile_service.refresh(db, senders)
+        return deleted, indexed_ids
@@ -0,0 +1,161 @@
+import logging
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from dotenv import load_dotenv
+
+from app.utils.serialization import dumps_json
+from app.utils.profiling import is_profiling
+from app.utils.coalescing import InFlightRequests
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# (expires_at, etag, body)
+CacheEntry = Tuple[float, str, bytes]
+
+class CacheService:
+    """Short-TTL response cache: in-process LRU with an optional shared (Redis) backend"""
+
+    def __init__(self, namespace: str = "cache"):
+        self.namespace = namespace
+        self.ttl_seconds = int(os.getenv("CACHE_TTL_SECONDS", "30"))
+        self.max_entries = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+        self.backend_url = os.getenv("CACHE_BACKEND_URL")
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = InFlightRequests(f"cache:{namespace}")
+        self._generation = 0
+        self._shared = self._connect_shared_backend()
+
+    def _connect_shared_backend(self):
+        """Connect to the shared cache backend if one is configured"""
+        if not self.backend_url:
+            return None
+        try:
+            import redis
+            client = redis.Redis.from_url(self.backend_url)
+            client.ping()
+            return client
+        except Exception as e:
+            logger.error("Error connecting to cache backend: %s", e)
+            return None
+
+    def _current_generation(self) -> int:
+        """Generation counter; bumping it invalidates every key in the namespace"""
+        if self._shared is not None:
+            try:
+                value = self._shared.get(f"{self.namespace}:generation")
+                return int(value) if value else 0
+            except Exception as e:
+                logger.error("Error reading cache generation: %s", e)
+        return self._generation
+
+    def _get_local(self, full_key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[full_key]
+                return None
+            self._entries.move_to_end(full_key)
+            return entry
+
+    def _set_local(self, full_key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[full_key] = entry
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, full_key: str) -> Optional[CacheEntry]:
+        if self._shared is None:
+            return None
+        try:
+            value = self._shared.get(full_key)
+        except Exception as e:
+            logger.error("Error reading from cache backend: %s", e)
+            return None
+        if not value:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return time.monotonic() + self.ttl_seconds, etag.decode(), body
+
+    def _set_shared(self, full_key: str, entry: CacheEntry):
+        if self._shared is None:
+            return
+        try:
+            self._shared.setex(full_key, self.ttl_seconds, entry[1].encode() + b"\n" + entry[2])
+        except Exception as e:
+            logger.error("Error writing to cache backend: %s", e)
+
+    def _build_entry(self, value: Any) -> CacheEntry:
+        body = dumps_json(jsonable_encoder(value))
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        return time.monotonic() + self.ttl_seconds, etag, body
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Any]) -> CacheEntry:
+        """Return a cached entry, computing it once even when several requests miss together"""
+        full_key = f"{self.namespace}:{self._current_generation()}:{key}"
+
+        # Profiled requests measure the real computation, on the profiled thread
+        if is_profiling():
+            return self._build_entry(compute())
+
+        entry = self._get_local(full_key)
+        if entry is None:
+            entry = self._get_shared(full_key)
+            if entry is not None:
+                self._set_local(full_key, entry)
+        if entry is not None:
+            return entry
+
+        def compute_entry() -> CacheEntry:
+            entry = self._build_entry(compute())
+            self._set_local(full_key, entry)
+            self._set_shared(full_key, entry)
+            return entry
+
+        # Coalesce concurrent misses onto the first caller's computation
+        return await self._inflight.run(full_key, compute_entry)
+
+    async def respond(self, request: Request, key: str, compute: Callable[[], Any]) -> Response:
+        """Serve a cached JSON response with ETag validation"""
+        _, etag, body = await self.get_or_compute(key, compute)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, max-age=0, must-revalidate"
+        }
+
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def size(self) -> int:
+        """Entries currently held in the in-process cache"""
+        with self._lock:
+            return len(self._entries)
+
+    def invalidate(self):
+        """Drop every cached entry in this namespace"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        if self._shared is not None:
+            try:
+                self._shared.incr(f"{self.namespace}:generation")
+            except Exception as e:
+                logger.error("Error invalidating cache backend: %s", e)
+
+# Shared by the dashboard routes and the email write paths that invalidate it
+dashboard_cache = CacheService(namespace="dashboard")
@@ -0,0 +1,118 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import Email
+from app.models.changes import EmailChange
+
+load_dotenv()
+
+class ChangeLogService:
+    """Version-stamped change log of the emails table for delta sync"""
+
+    def __init__(self):
+        self.retention_days = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+        self.max_page_size = int(os.getenv("CHANGE_LOG_MAX_PAGE_SIZE", "1000"))
+        self.content_table = Email.__tablename__
+        self.log_table = EmailChange.__tablename__
+
+    def ensure_tracking(self, engine):
+        """Record every insert, update and delete of an email.
+
+        On SQLite this uses triggers, so set-based and archival writes are
+        logged too; other databases fall back to ORM flush events.
+        """
+        if engine.dialect.name != "sqlite":
+            if not event.contains(Session, "after_flush", _record_orm_changes):
+                event.listen(Session, "after_flush", _record_orm_changes)
+            return
+
+        with engine.begin() as conn:
+            for name, timing, row, op in (
+                ("ins", "AFTER INSERT", "new", "upsert"),
+                ("upd", "AFTER UPDATE", "new", "upsert"),
+                ("del", "AFTER DELETE", "old", "delete")
+            ):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {self.log_table}_{name} {timing} ON {self.content_table} BEGIN "
+                    f"INSERT INTO {self.log_table}(email_id, op, changed_at) "
+                    f"VALUES ({row}.id, '{op}', strftime('%Y-%m-%d %H:%M:%f', 'now')); "
+                    f"END"
+                ))
+
+    def latest_version(self, db: Session) -> int:
+        return db.query(func.max(EmailChange.version)).scalar() or 0
+
+    def is_expired(self, db: Session, since: int) -> bool:
+        """True when changes after `since` have been pruned and the client must resync"""
+        oldest = db.query(func.min(EmailChange.version)).scalar()
+        return oldest is not None and since < oldest - 1
+
+    def changes_since(self, db: Session, since: int, limit: int = None) -> Dict[str, Any]:
+        """Latest change per email after `since`, oldest first, with the rows of upserted emails"""
+        limit = min(limit or self.max_page_size, self.max_page_size)
+
+        latest = db.query(
+            EmailChange.email_id,
+            func.max(EmailChange.version).label("version")
+        ).filter(EmailChange.version > since).group_by(EmailChange.email_id).subquery()
+
+        changes = db.query(EmailChange.email_id, EmailChange.version, EmailChange.op).join(
+            latest, EmailChange.version == latest.c.version
+        ).order_by(EmailChange.version).limit(limit + 1).all()
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        upserted_ids = [change.email_id for change in changes if change.op == "upsert"]
+        emails = {
+            email.id: email
+            for email in db.query(Email).filter(Email.id.in_(upserted_ids)).all()
+        } if upserted_ids else {}
+
+        upserted: List[Dict[str, Any]] = []
+        deleted: List[int] = []
+        for change in changes:
+            email = emails.get(change.email_id)
+            if change.op == "delete" or email is None:
+                deleted.append(change.email_id)
+            else:
+                upserted.append(self.to_dict(email))
+
+        return {
+            "since": since,
+            "next": changes[-1].version if changes else since,
+            "has_more": has_more,
+            "upserted": upserted,
+            "deleted": deleted
+        }
+
+    def prune(self, db: Session, older_than_days: Optional[int] = None) -> int:
+        """Drop changes past retention, keeping the newest so versions keep increasing"""
+        days = self.retention_days if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        latest = self.latest_version(db)
+
+        deleted = db.query(EmailChange).filter(
+            EmailChange.changed_at < cutoff,
+            EmailChange.version < latest
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    def to_dict(self, email: Email) -> Dict[str, Any]:
+        return {column.name: getattr(email, column.name) for column in Email.__table__.columns}
+
+def _record_orm_changes(session: Session, flush_context):
+    """after_flush fallback for databases without change-log triggers"""
+    rows = [(obj.id, "upsert") for obj in list(session.new) + list(session.dirty)
+            if isinstance(obj, Email) and session.is_modified(obj)]
+    rows += [(obj.id, "delete") for obj in session.deleted if isinstance(obj, Email)]
+    if rows:
+        session.execute(
+            EmailChange.__table__.insert(),
+            [{"email_id": email_id, "op": op, "changed_at": datetime.utcnow()} for email_id, op in rows]
+        )
@@ -0,0 +1,208 @@
+import os
+import re
+import zlib
+import random
+from array import array
+from typing import Any, Dict, List, Optional, Union
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import Email
+from app.models.archive import ArchivedEmail
+from app.models.clusters import EmailCluster, EmailLSHBucket
+from app.utils.helpers import clean_email_body
+
+load_dotenv()
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+class ClusteringService:
+    """Group near-duplicate emails with MinHash/LSH and thread replies by message headers"""
+
+    def __init__(self):
+        self.num_bands = int(os.getenv("CLUSTER_LSH_BANDS", "16"))
+        self.rows_per_band = int(os.getenv("CLUSTER_LSH_ROWS", "4"))
+        self.similarity_threshold = float(os.getenv("CLUSTER_SIMILARITY_THRESHOLD", "0.6"))
+        self.shingle_size = 3
+        self.num_hashes = self.num_bands * self.rows_per_band
+
+        # Fixed seed so signatures stay comparable across processes and restarts
+        rng = random.Random(1337)
+        self._hash_params = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(self.num_hashes)
+        ]
+
+    def shingles(self, body: str) -> set:
+        """Word shingles of the cleaned body (quotes and signatures removed)"""
+        words = re.findall(r"\w+", clean_email_body(body or "").lower())
+        if len(words) < self.shingle_size:
+            return set(words)
+        return {
+            " ".join(words[i:i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def compute_signature(self, body: str) -> Optional[List[int]]:
+        """MinHash signature of the body's shingle set"""
+        shingle_hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in self.shingles(body)]
+        if not shingle_hashes:
+            return None
+
+        return [
+            min(((a * h + b) % _PRIME) & _MAX_HASH for h in shingle_hashes)
+            for a, b in self._hash_params
+        ]
+
+    def band_buckets(self, signature: List[int]) -> List[str]:
+        """One bucket key per LSH band"""
+        buckets = []
+        for band in range(self.num_bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            buckets.append(format(zlib.crc32(array("I", rows).tobytes()), "08x"))
+        return buckets
+
+    def estimate_similarity(self, signature_a: List[int], signature_b: List[int]) -> float:
+        """Estimated Jaccard similarity of two MinHash signatures"""
+        matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+        return matches / len(signature_a) if signature_a else 0.0
+
+    def _find_thread_parent(self, db: Session, in_reply_to: str,
+                            reference_ids: List[str]) -> Optional[EmailCluster]:
+        """Find the stored email this one replies to, by In-Reply-To then References"""
+        candidates = [in_reply_to] if in_reply_to else []
+        candidates.extend(reversed(reference_ids))
+        if not candidates:
+            return None
+
+        parents = db.query(EmailCluster).filter(EmailCluster.message_id.in_(candidates)).all()
+        by_message_id = {parent.message_id: parent for parent in parents}
+        for message_id in candidates:
+            if message_id in by_message_id:
+                return by_message_id[message_id]
+        return None
+
+    def _find_near_duplicate(self, db: Session, email_id: int,
+                             signature: List[int], buckets: List[str]) -> Optional[EmailCluster]:
+        """Find the most similar stored email sharing at least one LSH bucket"""
+        candidate_ids = {
+            row.email_id for row in db.query(EmailLSHBucket.email_id).filter(
+                and_(
+                    EmailLSHBucket.email_id != email_id,
+                    or_(*[
+                        and_(EmailLSHBucket.band == band, EmailLSHBucket.bucket == bucket)
+                        for band, bucket in enumerate(buckets)
+                    ])
+                )
+            ).distinct()
+        }
+        if not candidate_ids:
+            return None
+
+        best_match = None
+        best_score = self.similarity_threshold
+        for candidate in db.query(EmailCluster).filter(EmailCluster.email_id.in_(candidate_ids)).all():
+            if not candidate.signature:
+                continue
+            score = self.estimate_similarity(signature, list(array("I", candidate.signature)))
+            if score >= best_score:
+                best_match, best_score = candidate, score
+
+        return best_match
+
+    def assign(self, db: Session, email: Email, email_data: Dict[str, Any]) -> EmailCluster:
+        """Assign a flushed email to a reply thread and near-duplicate cluster"""
+        message_id = email_data.get('message_id') or None
+        in_reply_to = email_data.get('in_reply_to') or None
+        reference_ids = email_data.get('references') or []
+
+        signature = self.compute_signature(email.body)
+        buckets = self.band_buckets(signature) if signature else []
+
+        # Replies join their parent's thread; the cluster is only ever a near-duplicate match,
+        # so a follow-up is not grouped with (and answered from) the earlier messages of its thread
+        parent = self._find_thread_parent(db, in_reply_to, reference_ids)
+        match = self._find_near_duplicate(db, email.id, signature, buckets) if signature else None
+
+        thread_id = parent.thread_id if parent is not None else message_id
+        cluster_id = match.cluster_id if match is not None else email.id
+
+        record = EmailCluster(
+            email_id=email.id,
+            cluster_id=cluster_id,
+            thread_id=thread_id,
+            message_id=message_id,
+            in_reply_to=in_reply_to,
+            reference_ids=" ".join(reference_ids) if reference_ids else None,
+            signature=array("I", signature).tobytes() if signature else None
+        )
+        db.add(record)
+
+        for band, bucket in enumerate(buckets):
+            db.add(EmailLSHBucket(email_id=email.id, band=band, bucket=bucket))
+
+        # Make the new email visible to the next one in the same batch
+        db.flush()
+        return record
+
+    def get_cluster(self, db: Session, email_id: int) -> Optional[EmailCluster]:
+        return db.query(EmailCluster).filter(EmailCluster.email_id == email_id).first()
+
+    def get_cluster_members(self, db: Session, cluster_id: int) -> List[Email]:
+        return db.query(Email).join(
+            EmailCluster, EmailCluster.email_id == Email.id
+        ).filter(
+            EmailCluster.cluster_id == cluster_id
+        ).order_by(Email.received_at).all()
+
+    def get_thread_members(self, db: Session, thread_id: Optional[str]) -> List[Email]:
+        if thread_id is None:
+            return []
+        return db.query(Email).join(
+            EmailCluster, EmailCluster.email_id == Email.id
+        ).filter(
+            EmailCluster.thread_id == thread_id
+        ).order_by(Email.received_at).all()
+
+    def find_cluster_draft(self, db: Session, email_id: int) -> Optional[Union[Email, ArchivedEmail]]:
+        """An unsent draft of a near-duplicate email from another thread (archived ones included)
+
+        Members of the email's own thread and drafts already sent are
+        skipped, so a follow-up never gets the previous reply copied back.
+        """
+        cluster = self.get_cluster(db, email_id)
+        if cluster is None:
+            return None
+
+        conditions = [EmailCluster.cluster_id == cluster.cluster_id]
+        if cluster.thread_id is not None:
+            conditions.append(or_(EmailCluster.thread_id.is_(None), EmailCluster.thread_id != cluster.thread_id))
+
+        # Cluster membership outlives archival, so older drafts are found in the archive table
+        for model in (Email, ArchivedEmail):
+            draft = db.query(model).join(
+                EmailCluster, EmailCluster.email_id == model.id
+            ).filter(
+                and_(
+                    *conditions,
+                    model.id != email_id,
+                    model.response_sent == False,
+                    model.ai_response.isnot(None),
+                    model.ai_response != ""
+                )
+            ).order_by(model.updated_at.desc()).first()
+            if draft is not None:
+                return draft
+        return None
+
+    def forget(self, db: Session, email_id: int):
+        """Remove an email's cluster membership and LSH buckets"""
+        self.forget_many(db, [email_id])
+
+    def forget_many(self, db: Session, email_ids):
+        """Remove cluster membership and LSH buckets of several emails (ids or an id subquery)"""
+        db.query(EmailLSHBucket).filter(EmailLSHBucket.email_id.in_(email_ids)).delete(synchronize_session=False)
+        db.query(EmailCluster).filter(EmailCluster.email_id.in_(email_ids)).delete(synchronize_session=False)
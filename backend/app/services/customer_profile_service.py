@@ -0,0 +1,261 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, case, event, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import SessionLocal, Email
+from app.models.archive import ArchivedEmail
+from app.models.customer import CustomerProfile
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Session.info key: profile rows this session has touched (None once deleted), by sender; evicted on commit
+_TOUCHED = "customer_profiles_touched"
+
+# (expires_at, profile snapshot or None for an unknown sender)
+CacheEntry = Tuple[float, Optional[Dict[str, Any]]]
+
+class CustomerProfileService:
+    """Per-sender history (ticket count, open tickets, last sentiment, average response time)
+
+    Writers update the customer_profiles row in the same transaction as
+    the email change, so the profile never drifts from the emails table.
+    Readers go through an in-process LRU keyed by sender_email; entries
+    are evicted when a transaction touching the sender commits, and
+    expire after CUSTOMER_PROFILE_CACHE_TTL_SECONDS so changes committed
+    by other worker processes are picked up too.
+    """
+
+    def __init__(self):
+        self.cache_size = int(os.getenv("CUSTOMER_PROFILE_CACHE_SIZE", "10000"))
+        self.cache_ttl_seconds = float(os.getenv("CUSTOMER_PROFILE_CACHE_TTL_SECONDS", "300"))
+        self.refresh_batch_size = 500
+
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every eviction, so a read that raced a commit does not cache the old row
+        self._version = 0
+
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    # --- Reads ---
+
+    def lookup(self, sender_email: str, db: Optional[Session] = None) -> Optional[Dict[str, Any]]:
+        """Committed profile of a sender, or None for a first-time sender"""
+        if not sender_email:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(sender_email)
+            if entry is not None and entry[0] >= now:
+                self._cache.move_to_end(sender_email)
+                return entry[1]
+            version = self._version
+
+        session = db or SessionLocal()
+        try:
+            row = session.query(CustomerProfile).filter(CustomerProfile.sender_email == sender_email).first()
+            profile = self._snapshot(row) if row else None
+        except Exception as e:
+            logger.error("Error loading customer profile: %s", e)
+            return None
+        finally:
+            if db is None:
+                session.close()
+
+        with self._lock:
+            if version == self._version:
+                self._cache[sender_email] = (now + self.cache_ttl_seconds, profile)
+                self._cache.move_to_end(sender_email)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return profile
+
+    def current(self, db: Session, sender_email: str) -> Optional[CustomerProfile]:
+        """Profile row as this session sees it, including its own uncommitted changes"""
+        touched = db.info.get(_TOUCHED, {})
+        if sender_email in touched:
+            return touched[sender_email]
+        return db.get(CustomerProfile, sender_email) if sender_email else None
+
+    def _snapshot(self, row: CustomerProfile) -> Dict[str, Any]:
+        return {
+            'ticket_count': row.ticket_count,
+            'open_tickets': row.open_tickets,
+            'last_sentiment': row.last_sentiment,
+            'last_contact_at': row.last_received_at.isoformat() if row.last_received_at else None,
+            'avg_response_hours': round(row.total_response_seconds / row.responded_count / 3600, 2)
+            if row.responded_count else None
+        }
+
+    # --- Incremental updates (called inside the writer's transaction) ---
+
+    def state(self, email: Email) -> Tuple[bool, Optional[float]]:
+        """(open, seconds from receipt to response) of an email, as record_change compares them"""
+        is_open = not email.processed and not email.response_sent
+        response_seconds = None
+        if email.response_sent and email.response_sent_at and email.received_at:
+            response_seconds = max((email.response_sent_at - email.received_at).total_seconds(), 0.0)
+        return is_open, response_seconds
+
+    def record_ingest(self, db: Session, email: Email):
+        """Count a newly stored email towards its sender's profile"""
+        if not email.sender_email:
+            return
+        row = self.current(db, email.sender_email)
+        if row is None:
+            row = CustomerProfile(
+                sender_email=email.sender_email, ticket_count=0, open_tickets=0,
+                responded_count=0, total_response_seconds=0.0
+            )
+            db.add(row)
+        self._touch(db, row)
+
+        is_open, response_seconds = self.state(email)
+        row.ticket_count += 1
+        row.open_tickets += int(is_open)
+        if response_seconds is not None:
+            row.responded_count += 1
+            row.total_response_seconds += response_seconds
+        # Backfilled or out-of-order mail must not overwrite the latest sentiment
+        if row.last_received_at is None or (email.received_at and email.received_at >= row.last_received_at):
+            row.last_sentiment = email.sentiment
+            row.last_received_at = email.received_at
+
+    def record_change(self, db: Session, email: Email, before: Tuple[bool, Optional[float]]):
+        """Apply an email's status change (before = state(email) ahead of the change)"""
+        after = self.state(email)
+        if after == before or not email.sender_email:
+            return
+        row = self.current(db, email.sender_email)
+        if row is None:
+            # Sender predates the profile table; count them from scratch
+            self.refresh(db, [email.sender_email])
+            return
+        self._touch(db, row)
+
+        row.open_tickets += int(after[0]) - int(before[0])
+        if before[1] is not None:
+            row.responded_count -= 1
+            row.total_response_seconds -= before[1]
+        if after[1] is not None:
+            row.responded_count += 1
+            row.total_response_seconds += after[1]
+
+    def refresh(self, db: Session, sender_emails: Iterable[str]):
+        """Recompute profiles from the hot and archived emails (after set-based changes and deletes)"""
+        senders = sorted({sender for sender in sender_emails if sender})
+        if not senders:
+            return
+        db.flush()
+
+        for start in range(0, len(senders), self.refresh_batch_size):
+            batch = senders[start:start + self.refresh_batch_size]
+            totals: Dict[str, Dict[str, Any]] = {}
+
+            for model in (Email, ArchivedEmail):
+                responded = and_(
+                    model.response_sent == True,
+                    model.response_sent_at.isnot(None),
+                    model.received_at.isnot(None)
+                )
+                # SQLite fills bare columns (sentiment) from the row holding max(received_at)
+                rows = db.query(
+                    model.sender_email,
+                    func.count(model.id).label("tickets"),
+                    func.sum(case((and_(model.processed == False, model.response_sent == False), 1), else_=0)).label("open"),
+                    func.sum(case((responded, 1), else_=0)).label("responded"),
+                    func.sum(case((responded, func.strftime('%s', model.response_sent_at) -
+                                   func.strftime('%s', model.received_at)), else_=0)).label("response_seconds"),
+                    model.sentiment,
+                    func.max(model.received_at).label("last_received_at")
+                ).filter(model.sender_email.in_(batch)).group_by(model.sender_email).all()
+
+                for row in rows:
+                    total = totals.setdefault(row.sender_email, {
+                        "ticket_count": 0, "open_tickets": 0, "responded_count": 0,
+                        "total_response_seconds": 0.0, "last_sentiment": None, "last_received_at": None
+                    })
+                    total["ticket_count"] += row.tickets
+                    total["open_tickets"] += int(row.open or 0)
+                    total["responded_count"] += int(row.responded or 0)
+                    total["total_response_seconds"] += float(row.response_seconds or 0)
+                    if total["last_received_at"] is None or \
+                            (row.last_received_at and row.last_received_at > total["last_received_at"]):
+                        total["last_sentiment"] = row.sentiment
+                        total["last_received_at"] = row.last_received_at
+
+            existing = {
+                row.sender_email: row for row in
+                db.query(CustomerProfile).filter(CustomerProfile.sender_email.in_(batch))
+            }
+            for sender in batch:
+                row = existing.get(sender)
+                if sender not in totals:
+                    # Every ticket from this sender was deleted
+                    if row is not None:
+                        db.delete(row)
+                        db.info.setdefault(_TOUCHED, {})[sender] = None
+                    continue
+                if row is None:
+                    row = CustomerProfile(sender_email=sender)
+                    db.add(row)
+                for field, value in totals[sender].items():
+                    setattr(row, field, value)
+                self._touch(db, row)
+
+    def senders_of(self, db: Session, email_ids) -> List[str]:
+        """Distinct senders of some emails (a list of ids or an id subquery)"""
+        return [row.sender_email for row in db.query(Email.sender_email).filter(Email.id.in_(email_ids)).distinct()]
+
+    def rebuild(self, db: Session):
+        """Recompute every profile from scratch"""
+        db.query(CustomerProfile).delete(synchronize_session=False)
+        senders = {row.sender_email for row in db.query(Email.sender_email).distinct()}
+        senders.update(row.sender_email for row in db.query(ArchivedEmail.sender_email).distinct())
+        self.refresh(db, senders)
+        db.commit()
+        self.clear_cache()
+
+    def ensure_built(self, db: Session):
+        """Backfill profiles for databases created before they existed"""
+        if db.query(CustomerProfile.sender_email).first() is None and db.query(Email.id).first() is not None:
+            self.rebuild(db)
+
+    # --- Cache maintenance ---
+
+    def _touch(self, db: Session, row: CustomerProfile):
+        row.updated_at = datetime.utcnow()
+        db.info.setdefault(_TOUCHED, {})[row.sender_email] = row
+
+    def _after_commit(self, session: Session):
+        touched = session.info.pop(_TOUCHED, None)
+        if touched:
+            self.evict(touched.keys())
+
+    def _after_rollback(self, session: Session):
+        session.info.pop(_TOUCHED, None)
+
+    def evict(self, sender_emails: Iterable[str]):
+        with self._lock:
+            self._version += 1
+            for sender in sender_emails:
+                self._cache.pop(sender, None)
+
+    def clear_cache(self):
+        with self._lock:
+            self._version += 1
+            self._cache.clear()
+
+# Shared so every write path evicts the same cache the readers use
+customer_profile_service = CustomerProfileService()
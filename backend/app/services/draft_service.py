@@ -0,0 +1,248 @@
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import SessionLocal, Email
+from app.services.analysis_store import AnalysisStore
+from app.services.customer_profile_service import customer_profile_service
+from app.services.similarity_service import similarity_service
+from app.services.usage_service import UsageService
+from app.services.write_queue import write_queue
+from app.services.cache_service import dashboard_cache
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+pregeneration_outcomes = metrics.counter(
+    "draft_pregeneration_total", "Speculative draft generations by outcome", ("outcome",)
+)
+
+class LateResponseSaver:
+    """on_late_response callback that stores an LLM answer once the template it replaces is saved
+
+    The LLM can finish between the deadline and the template being
+    written; the answer is held until template_saved() so the template
+    write cannot overwrite it. Whichever of the two happens last saves it.
+    """
+
+    def __init__(self, draft_service: "DraftService", email_id: int):
+        self.draft_service = draft_service
+        self.email_id = email_id
+        self._lock = threading.Lock()
+        self._template_saved = False
+        self._pending: Optional[Tuple[str, Dict[str, Any], str]] = None
+
+    def __call__(self, ai_response: str, usage: Dict[str, Any], template_text: str):
+        with self._lock:
+            if not self._template_saved:
+                self._pending = (ai_response, usage, template_text)
+                return
+        self.draft_service.save_late_response(self.email_id, ai_response, usage, template_text)
+
+    def template_saved(self):
+        with self._lock:
+            self._template_saved = True
+            pending, self._pending = self._pending, None
+        if pending:
+            self.draft_service.save_late_response(self.email_id, *pending)
+
+class DraftService:
+    """Builds generation inputs for an email and optionally pre-generates drafts at ingest
+
+    With DRAFT_PREGENERATION_ENABLED, newly ingested emails are queued
+    for draft generation, urgent first and then oldest first. At most
+    DRAFT_PREGEN_CONCURRENCY generations run at once and at most
+    DRAFT_PREGEN_MAX_PER_HOUR are started in any rolling hour. Emails
+    processed, answered or deleted before their turn are cancelled, and
+    a finished draft never overwrites one the agent already has.
+    """
+
+    def __init__(self, ai_service):
+        self.ai_service = ai_service
+        self.analysis_store = AnalysisStore()
+        self.usage_service = UsageService()
+        self.enabled = os.getenv("DRAFT_PREGENERATION_ENABLED", "False").lower() == "true"
+        self.concurrency = int(os.getenv("DRAFT_PREGEN_CONCURRENCY", "2"))
+        self.max_per_hour = int(os.getenv("DRAFT_PREGEN_MAX_PER_HOUR", "60"))
+
+        # Heap of [priority rank, received timestamp, seq, email_id]; cancelled entries have email_id None
+        self._heap: List[list] = []
+        self._entries: Dict[int, list] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._started: Deque[float] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+        metrics.gauge(
+            "draft_pregeneration_pending", "Emails waiting for a speculative draft", (),
+            lambda: {(): len(self._entries)}
+        )
+
+    def generation_inputs(self, db: Session, email: Email,
+                          custom_context: str = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Email data and analysis context passed to the response generator"""
+        email_data = {
+            'sender_email': email.sender_email,
+            'subject': email.subject,
+            'body': email.body,
+            'received_at': email.received_at
+        }
+
+        analysis = {
+            'sentiment': email.sentiment,
+            'sentiment_score': email.sentiment_score,
+            'priority': email.priority,
+            'category': email.category,
+            **self.analysis_store.load(db, email)
+        }
+
+        # Past resolved tickets as examples for the prompt
+        analysis['similar_tickets'] = similarity_service.get_similar_tickets(db, email)
+        analysis['customer_profile'] = customer_profile_service.lookup(email.sender_email, db)
+
+        if custom_context:
+            analysis['custom_context'] = custom_context
+
+        return email_data, analysis
+
+    def late_response_saver(self, email_id: int) -> LateResponseSaver:
+        """Callback for an LLM answer that arrived after the template was already returned"""
+        return LateResponseSaver(self, email_id)
+
+    def save_late_response(self, email_id: int, ai_response: str, usage: Dict[str, Any], template_text: str):
+        def job(write_db: Session) -> bool:
+            self.usage_service.record(write_db, email_id, usage)
+            # Only replace the stand-in if the agent has neither edited nor sent it
+            return bool(write_db.query(Email).filter(
+                Email.id == email_id,
+                Email.ai_response == template_text,
+                Email.response_sent == False
+            ).update({"ai_response": ai_response}, synchronize_session=False))
+
+        if write_queue.submit(job).result():
+            dashboard_cache.invalidate()
+
+    # --- Speculative pre-generation ---
+
+    def enqueue(self, email_id: int, priority: str, received_at: Optional[datetime] = None):
+        """Queue a newly ingested email for a draft (no-op unless enabled)"""
+        if not self.enabled:
+            return
+        entry = [0 if priority == "urgent" else 1, received_at.timestamp() if received_at else time.time(),
+                 next(self._seq), email_id]
+        with self._lock:
+            if email_id in self._entries:
+                return
+            self._entries[email_id] = entry
+            heapq.heappush(self._heap, entry)
+        self._ensure_workers()
+        self._wakeup.set()
+
+    def cancel(self, email_ids: List[int]):
+        """Drop pending drafts for emails that no longer need one"""
+        with self._lock:
+            for email_id in email_ids:
+                entry = self._entries.pop(email_id, None)
+                if entry is not None:
+                    entry[3] = None
+                    pregeneration_outcomes.inc(outcome="cancelled")
+
+    def pending(self) -> int:
+        return len(self._entries)
+
+    def _ensure_workers(self):
+        if self._workers and not all(worker.done() for worker in self._workers):
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.get_running_loop().create_task(self._worker())
+            for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _next(self) -> Optional[int]:
+        with self._lock:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if entry[3] is not None:
+                    del self._entries[entry[3]]
+                    return entry[3]
+            return None
+
+    async def _wait_for_budget(self) -> float:
+        """Sleep until starting another generation keeps within the hourly cap; returns the slot taken"""
+        while True:
+            now = time.monotonic()
+            while self._started and now - self._started[0] >= 3600:
+                self._started.popleft()
+            if len(self._started) < self.max_per_hour:
+                self._started.append(now)
+                return now
+            await asyncio.sleep(3600 - (now - self._started[0]))
+
+    async def _worker(self):
+        while True:
+            # Take a budget slot only once there is work, so idle workers do not hold slots
+            email_id = self._next()
+            while email_id is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                email_id = self._next()
+            slot = await self._wait_for_budget()
+            try:
+                outcome = await asyncio.to_thread(self._generate, email_id)
+            except Exception as e:
+                logger.error("Error pre-generating draft for email %s: %s", email_id, e)
+                outcome = "failed"
+            if outcome == "skipped":
+                # Nothing was generated, so give this worker's slot back (unless it already expired)
+                if slot in self._started:
+                    self._started.remove(slot)
+            pregeneration_outcomes.inc(outcome=outcome)
+
+    def _generate(self, email_id: int) -> str:
+        db = SessionLocal()
+        try:
+            email = db.query(Email).filter(Email.id == email_id).first()
+            if not email or email.processed or email.response_sent or email.ai_response:
+                return "skipped"
+            email_data, analysis = self.generation_inputs(db, email)
+        finally:
+            db.close()
+
+        # Nobody is waiting on a speculative draft, so no deadline; a template stand-in is not worth storing
+        ai_response, usage = self.ai_service.generate_response_with_usage(email_data, analysis, use_deadline=False)
+        if usage.get('fallback'):
+            return "fallback"
+
+        def save(write_db: Session) -> bool:
+            # The tokens were spent either way; the draft only lands if nobody got there first
+            self.usage_service.record(write_db, email_id, usage)
+            return bool(write_db.query(Email).filter(
+                Email.id == email_id,
+                Email.ai_response.is_(None),
+                Email.processed == False,
+                Email.response_sent == False
+            ).update({"ai_response": ai_response}, synchronize_session=False))
+
+        if not write_queue.submit(save).result():
+            return "discarded"
+        dashboard_cache.invalidate()
+        return "generated"
@@ -1,3 +1,4 @@
+import logging
 import imaplib
 import email
 import os
@@ -10,8 +11,14 @@ from email.mime.multipart import MIMEMultipart
 import smtplib
 from dotenv import load_dotenv
 
+from app.services.mime_parser import MimeParser
+from app.services.blob_store import BlobStore
+from app.utils.metrics import timed_stage
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class EmailService:
     def __init__(self):
         self.imap_server = os.getenv("IMAP_SERVER", "imap.gmail.com")
@@ -19,15 +26,18 @@ class EmailService:
         self.email_address = os.getenv("EMAIL_ADDRESS")
         self.email_password = os.getenv("EMAIL_PASSWORD")
         self.support_keywords = ["support", "query", "request", "help"]
+        self.mime_parser = MimeParser()
+        self.blob_store = BlobStore()
         
     def connect_imap(self):
         """Connect to IMAP server"""
         try:
-            mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
-            mail.login(self.email_address, self.email_password)
+            with timed_stage("imap.connect"):
+                mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+                mail.login(self.email_address, self.email_password)
             return mail
         except Exception as e:
-            print(f"Error connecting to IMAP: {e}")
+            logger.error("Error connecting to IMAP: %s", e)
             return None
     
     def fetch_support_emails(self, days_back: int = 1) -> List[Dict[str, Any]]:
@@ -44,7 +54,8 @@ class EmailService:
             
             # Search for recent emails
             search_criteria = f'(SINCE "{since_date}")'
-            status, message_ids = mail.search(None, search_criteria)
+            with timed_stage("imap.search"):
+                status, message_ids = mail.search(None, search_criteria)
             
             if status != 'OK':
                 return []
@@ -54,21 +65,42 @@ class EmailService:
             
             for msg_id in message_ids[-50:]:  # Limit to last 50 emails
                 try:
-                    status, msg_data = mail.fetch(msg_id, '(RFC822)')
-                    if status != 'OK':
+                    # Headers and size first; bodies are only downloaded for support emails
+                    with timed_stage("imap.fetch_headers"):
+                        status, header_data = mail.fetch(msg_id, '(RFC822.SIZE BODY.PEEK[HEADER])')
+                    if status != 'OK' or not header_data or not isinstance(header_data[0], tuple):
                         continue
                     
-                    raw_email = msg_data[0][1]
-                    email_message = email.message_from_bytes(raw_email)
+                    size_match = re.search(rb'RFC822\.SIZE (\d+)', header_data[0][0])
+                    # None when the server did not report a size
+                    message_size = int(size_match.group(1)) if size_match else None
+                    headers = self.mime_parser.parse_headers(header_data[0][1])
                     
                     # Extract email details
-                    subject = email_message.get('Subject', '')
-                    sender = email_message.get('From', '')
-                    date_str = email_message.get('Date', '')
+                    subject = self.mime_parser.header(headers, 'Subject')
+                    sender = self.mime_parser.header(headers, 'From')
+                    date_str = self.mime_parser.header(headers, 'Date')
                     
                     # Check if subject contains support keywords
                     if self._contains_support_keywords(subject):
-                        body = self._extract_email_body(email_message)
+                        # Oversized messages, and messages of unknown size, are fetched only up to
+                        # the parser's byte cap
+                        max_bytes = self.mime_parser.max_message_bytes
+                        if message_size is None or message_size > max_bytes:
+                            fetch_spec = f'(BODY[]<0.{max_bytes}>)'
+                        else:
+                            fetch_spec = '(RFC822)'
+                        
+                        with timed_stage("imap.fetch_body"):
+                            status, msg_data = mail.fetch(msg_id, fetch_spec)
+                        if status != 'OK' or not msg_data or not isinstance(msg_data[0], tuple):
+                            continue
+                        truncated = message_size > max_bytes if message_size is not None \
+                            else len(msg_data[0][1]) >= max_bytes
+                        
+                        with timed_stage("imap.parse"):
+                            email_message = self.mime_parser.parse(msg_data[0][1])
+                            body = self._extract_email_body(email_message)
                         
                         # Parse date
                         try:
@@ -79,18 +111,27 @@ class EmailService:
                         # Extract sender email from format "Name <email@domain.com>"
                         sender_email = self._extract_email_address(sender)
                         
+                        # Threading headers
+                        own_message_ids = self._extract_message_ids(headers.get('Message-ID', ''))
+                        in_reply_to = self._extract_message_ids(headers.get('In-Reply-To', ''))
+                        
                         email_data = {
                             'sender_email': sender_email,
                             'subject': subject,
                             'body': body,
                             'received_at': received_at,
-                            'raw_sender': sender
+                            'raw_sender': sender,
+                            'message_id': own_message_ids[0] if own_message_ids else None,
+                            'in_reply_to': in_reply_to[0] if in_reply_to else None,
+                            'references': self._extract_message_ids(headers.get('References', '')),
+                            # Attachments of a truncated download would be incomplete
+                            'attachments': [] if truncated else self._store_attachments(email_message)
                         }
                         
                         emails.append(email_data)
                         
                 except Exception as e:
-                    print(f"Error processing email {msg_id}: {e}")
+                    logger.error("Error processing email %s: %s", msg_id, e)
                     continue
             
             mail.close()
@@ -98,7 +139,7 @@ class EmailService:
             return emails
             
         except Exception as e:
-            print(f"Error fetching emails: {e}")
+            logger.error("Error fetching emails: %s", e)
             return []
     
     def _contains_support_keywords(self, subject: str) -> bool:
@@ -108,26 +149,20 @@ class EmailService:
     
     def _extract_email_body(self, email_message) -> str:
         """Extract text body from email message"""
-        body = ""
-        
-        if email_message.is_multipart():
-            for part in email_message.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-                
-                if content_type == "text/plain" and "attachment" not in content_disposition:
-                    try:
-                        body = part.get_payload(decode=True).decode('utf-8')
-                        break
-                    except:
-                        continue
-        else:
-            try:
-                body = email_message.get_payload(decode=True).decode('utf-8')
-            except:
-                body = str(email_message.get_payload())
-        
-        return body.strip()
+        return self.mime_parser.extract_body(email_message)
+    
+    def _store_attachments(self, email_message) -> List[Dict[str, Any]]:
+        """Write attachments to the blob store and return their metadata"""
+        attachments = []
+        for attachment in self.mime_parser.iter_attachments(email_message):
+            sha256, size = self.blob_store.put(attachment['data'])
+            attachments.append({
+                'filename': attachment['filename'],
+                'content_type': attachment['content_type'],
+                'size': size,
+                'sha256': sha256
+            })
+        return attachments
     
     def _extract_email_address(self, sender: str) -> str:
         """Extract email address from sender string"""
@@ -145,6 +180,10 @@ class EmailService:
         
         return sender
     
+    def _extract_message_ids(self, header_value: str) -> List[str]:
+        """Extract <message-id> tokens from Message-ID, In-Reply-To or References headers"""
+        return re.findall(r'<[^<>\s]+>', str(header_value or ''))
+    
     def send_response_email(self, to_email: str, subject: str, response_body: str) -> bool:
         """Send response email"""
         try:
@@ -156,20 +195,21 @@ class EmailService:
             
             msg.attach(MIMEText(response_body, 'plain'))
             
-            # Connect to SMTP server
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(self.email_address, self.email_password)
-            
-            # Send email
-            text = msg.as_string()
-            server.sendmail(self.email_address, to_email, text)
-            server.quit()
+            with timed_stage("smtp.send"):
+                # Connect to SMTP server
+                server = smtplib.SMTP('smtp.gmail.com', 587)
+                server.starttls()
+                server.login(self.email_address, self.email_password)
+                
+                # Send email
+                text = msg.as_string()
+                server.sendmail(self.email_address, to_email, text)
+                server.quit()
             
             return True
             
         except Exception as e:
-            print(f"Error sending email: {e}")
+            logger.error("Error sending email: %s", e)
             return False
     
     def extract_contact_info(self, email_body: str, sender_email: str) -> Dict[str, Any]:
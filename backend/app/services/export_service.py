@@ -0,0 +1,120 @@
+import io
+import os
+import csv
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import select
+from dotenv import load_dotenv
+
+from app.models.database import SessionLocal, Email
+from app.utils.serialization import dumps_json
+
+load_dotenv()
+
+class ExportService:
+    """Constant-memory export of the emails table as CSV, NDJSON or Parquet"""
+
+    media_types = {
+        "csv": "text/csv",
+        "ndjson": "application/x-ndjson",
+        "parquet": "application/vnd.apache.parquet"
+    }
+
+    def __init__(self):
+        self.chunk_rows = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+        self.columns = [column.name for column in Email.__table__.columns]
+
+    def check_format(self, export_format: str):
+        """Raise ValueError for unknown formats or a missing optional dependency"""
+        if export_format not in self.media_types:
+            raise ValueError(f"Unsupported format '{export_format}'; use one of: {', '.join(self.media_types)}")
+        if export_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    def _iter_chunks(self, priority_filter: str, sentiment_filter: str,
+                     processed_filter: bool) -> Iterator[List[tuple]]:
+        """Rows in id order, fetched through a server-side cursor one chunk at a time.
+
+        Uses its own session: the request-scoped one is closed before a
+        streaming response finishes.
+        """
+        statement = select(*[getattr(Email, name) for name in self.columns])
+        if priority_filter:
+            statement = statement.where(Email.priority == priority_filter)
+        if sentiment_filter:
+            statement = statement.where(Email.sentiment == sentiment_filter)
+        if processed_filter is not None:
+            statement = statement.where(Email.processed == processed_filter)
+        statement = statement.order_by(Email.id).execution_options(yield_per=self.chunk_rows)
+
+        db = SessionLocal()
+        try:
+            for partition in db.execute(statement).partitions():
+                yield partition
+        finally:
+            db.close()
+
+    def _plain(self, value: Any) -> Any:
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def _iter_csv(self, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.columns)
+        for rows in chunks:
+            writer.writerows([[self._plain(value) for value in row] for row in rows])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _iter_ndjson(self, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        for rows in chunks:
+            yield b"".join(
+                dumps_json({name: self._plain(value) for name, value in zip(self.columns, row)}) + b"\n"
+                for row in rows
+            )
+
+    def _iter_parquet(self, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+        """One row group per chunk; bytes are handed on as soon as each group is written"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {"INTEGER": pa.int64(), "FLOAT": pa.float64(), "BOOLEAN": pa.bool_(), "DATETIME": pa.timestamp("us")}
+        schema = pa.schema([
+            (column.name, arrow_types.get(str(column.type).split("(")[0].upper(), pa.string()))
+            for column in Email.__table__.columns
+        ])
+
+        sink = io.BytesIO()
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        try:
+            for rows in chunks:
+                columns = list(zip(*rows))
+                writer.write_batch(pa.record_batch(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+        finally:
+            writer.close()
+        yield sink.getvalue()
+
+    def stream(self, export_format: str, priority_filter: str = None, sentiment_filter: str = None,
+               processed_filter: bool = None) -> Iterator[bytes]:
+        """Encoded export, chunk by chunk"""
+        chunks = self._iter_chunks(priority_filter, sentiment_filter, processed_filter)
+        if export_format == "csv":
+            return self._iter_csv(chunks)
+        if export_format == "ndjson":
+            return self._iter_ndjson(chunks)
+        return self._iter_parquet(chunks)
+
+    def filename(self, export_format: str) -> str:
+        return f"emails-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
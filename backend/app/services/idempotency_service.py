@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.idempotency import IdempotencyKey
+from app.utils.serialization import dumps_json
+
+load_dotenv()
+
+class IdempotencyService:
+    """Stores the successful outcome of requests made with an Idempotency-Key so retries replay it"""
+
+    def __init__(self):
+        self.ttl_hours = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+        self.max_key_length = 255
+
+    def fingerprint(self, scope: str, params: Dict[str, Any]) -> str:
+        """Scope plus a digest of the request parameters, e.g. send-response:42:3f2a..."""
+        canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+        return f"{scope}:{digest}"
+
+    def reserve(self, db: Session, key: str, scope: str) -> Optional[IdempotencyKey]:
+        """Claim the key for this request; returns the existing record if it was already claimed"""
+        if len(key) > self.max_key_length:
+            raise ValueError(f"Idempotency-Key must be at most {self.max_key_length} characters")
+
+        # The primary key makes the claim atomic across requests and workers
+        try:
+            db.add(IdempotencyKey(key=key, scope=scope))
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+
+        # Expired: reuse the key as if it were new. Conditional, so of two
+        # requests reviving the same key only one gets to run
+        revived = db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at < datetime.utcnow() - timedelta(hours=self.ttl_hours)
+        ).update({
+            "scope": scope,
+            "status_code": None,
+            "response": None,
+            "created_at": datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+        if revived:
+            return None
+        existing = db.get(IdempotencyKey, key)
+        if existing is None:
+            # Released by a failed attempt in the meantime: claim it afresh
+            return self.reserve(db, key, scope)
+        return existing
+
+    def complete(self, db: Session, key: str, status_code: int, body: Any):
+        """Record the response returned for the key"""
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+            {"status_code": status_code, "response": dumps_json(body).decode("utf-8")},
+            synchronize_session=False
+        )
+        db.commit()
+
+    def release(self, db: Session, key: str):
+        """Forget the key so a retry runs again (used when the request failed)"""
+        db.rollback()
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete(synchronize_session=False)
+        db.commit()
+
+    def replay(self, record: IdempotencyKey) -> Any:
+        return json.loads(record.response) if record.response else None
+
+    def prune(self, db: Session) -> int:
+        """Drop keys past the retention window"""
+        cutoff = datetime.utcnow() - timedelta(hours=self.ttl_hours)
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
@@ -0,0 +1,146 @@
+import os
+import re
+import html
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesFeedParser, BytesHeaderParser
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class _HTMLToText(HTMLParser):
+    """Minimal HTML to plain text converter (drops scripts/styles, keeps line structure)"""
+
+    block_tags = {'p', 'div', 'br', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'table'}
+    skip_tags = {'script', 'style', 'head', 'title'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skip_tags:
+            self._skip_depth += 1
+        elif tag in self.block_tags:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.skip_tags and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self.block_tags:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+    def text(self) -> str:
+        text = ''.join(self.parts)
+        text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+        text = re.sub(r' *\n *', '\n', text)
+        return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+def html_to_text(markup: str) -> str:
+    """Convert an HTML body to readable plain text"""
+    parser = _HTMLToText()
+    try:
+        parser.feed(markup)
+        parser.close()
+        return parser.text()
+    except Exception:
+        # Malformed markup: strip tags the crude way
+        return html.unescape(re.sub(r'<[^>]+>', ' ', markup)).strip()
+
+class MimeParser:
+    """Bounded-memory MIME parsing with charset handling and body size caps"""
+
+    def __init__(self):
+        self.max_body_chars = int(os.getenv("MAX_BODY_CHARS", "20000"))
+        self.max_message_bytes = int(os.getenv("MAX_MESSAGE_BYTES", str(10 * 1024 * 1024)))
+        self.max_attachment_bytes = int(os.getenv("MAX_ATTACHMENT_BYTES", str(25 * 1024 * 1024)))
+        self.chunk_size = 64 * 1024
+        self.truncation_marker = "\n\n[message truncated]"
+
+    def parse_headers(self, raw_headers: bytes) -> EmailMessage:
+        """Parse only the header block (no body) of a message"""
+        return BytesHeaderParser(policy=policy.default).parsebytes(raw_headers)
+
+    def parse(self, raw_message: bytes) -> EmailMessage:
+        """Feed a message to the parser in chunks, stopping at max_message_bytes"""
+        parser = BytesFeedParser(policy=policy.default)
+        view = memoryview(raw_message)[:self.max_message_bytes]
+        for start in range(0, len(view), self.chunk_size):
+            parser.feed(view[start:start + self.chunk_size].tobytes())
+        return parser.close()
+
+    def _decode_part(self, part) -> str:
+        """Decode a text part using its declared charset, falling back gracefully"""
+        try:
+            return part.get_content()
+        except (LookupError, UnicodeDecodeError, AssertionError, KeyError):
+            pass
+
+        payload = part.get_payload(decode=True) or b''
+        for charset in (part.get_content_charset(), 'utf-8', 'cp1252'):
+            if not charset:
+                continue
+            try:
+                return payload.decode(charset)
+            except (LookupError, UnicodeDecodeError):
+                continue
+        return payload.decode('latin-1', errors='replace')
+
+    def _find_text_part(self, message: EmailMessage):
+        """Preferred text part: plain, then HTML; never an attachment"""
+        body_part = message.get_body(preferencelist=('plain', 'html'))
+        if body_part is not None:
+            return body_part
+
+        # get_body skips parts it does not recognize as body candidates
+        for part in message.walk():
+            if part.is_multipart() or part.is_attachment():
+                continue
+            if part.get_content_type() in ('text/plain', 'text/html'):
+                return part
+        return None
+
+    def truncate(self, text: str) -> str:
+        if len(text) <= self.max_body_chars:
+            return text
+        return text[:self.max_body_chars].rstrip() + self.truncation_marker
+
+    def extract_body(self, message: EmailMessage) -> str:
+        """Plain-text body of a parsed message, converted from HTML if needed and size-capped"""
+        part = self._find_text_part(message)
+        if part is None:
+            return ""
+
+        text = self._decode_part(part)
+        if part.get_content_type() == 'text/html':
+            text = html_to_text(text)
+
+        return self.truncate(text.strip())
+
+    def iter_attachments(self, message: EmailMessage) -> Iterator[Dict[str, Any]]:
+        """Yield decoded attachments as dicts with filename, content_type and data"""
+        for index, part in enumerate(message.walk()):
+            if part.is_multipart() or not part.is_attachment():
+                continue
+
+            data = part.get_payload(decode=True)
+            if not data or len(data) > self.max_attachment_bytes:
+                continue
+
+            yield {
+                'filename': part.get_filename() or f"attachment-{index}",
+                'content_type': part.get_content_type(),
+                'data': data
+            }
+
+    def header(self, message: EmailMessage, name: str, default: str = '') -> str:
+        """Decoded header value as a plain string"""
+        value: Optional[object] = message.get(name)
+        return str(value) if value is not None else default
@@ -0,0 +1,110 @@
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import Email
+from app.models.queue import EmailQueueEntry
+from app.services.customer_profile_service import customer_profile_service
+from app.utils.helpers import calculate_urgency_score, calculate_queue_rank
+
+load_dotenv()
+
+class QueueService:
+    """Priority work queue of open emails scored by urgency, sentiment, age and SLA"""
+
+    def __init__(self):
+        self.sla_hours = {
+            'urgent': float(os.getenv("SLA_URGENT_HOURS", "4")),
+            'not_urgent': float(os.getenv("SLA_STANDARD_HOURS", "24"))
+        }
+        self.urgency_hours_per_point = float(os.getenv("QUEUE_URGENCY_HOURS_PER_POINT", "1"))
+        self.negative_sentiment_hours = float(os.getenv("QUEUE_NEGATIVE_SENTIMENT_HOURS", "2"))
+        self.repeat_contact_hours = float(os.getenv("QUEUE_REPEAT_CONTACT_HOURS", "2"))
+        # Rank as urgent while the sender has this many other open tickets (0 disables); the stored priority is untouched
+        self.escalate_open_tickets = int(os.getenv("CUSTOMER_ESCALATE_OPEN_TICKETS", "0"))
+
+    def is_open(self, email: Email) -> bool:
+        return not email.processed and not email.response_sent
+
+    def upsert(self, db: Session, email: Email):
+        """Place an email in the queue, or take it out once it is handled (after its profile update)"""
+        entry = db.query(EmailQueueEntry).filter(EmailQueueEntry.email_id == email.id).first()
+
+        if not self.is_open(email):
+            if entry:
+                db.delete(entry)
+            return
+
+        urgency_score = calculate_urgency_score(email.subject or '', email.body or '')
+
+        # The sender's profile already counts this email; any other open ticket makes it a follow-up
+        profile = customer_profile_service.current(db, email.sender_email)
+        repeat_contact = profile is not None and profile.open_tickets > 1
+        escalated = self.escalate_open_tickets > 0 and profile is not None and \
+            profile.open_tickets - 1 >= self.escalate_open_tickets
+
+        queue_rank, sla_deadline = calculate_queue_rank(
+            urgency_score,
+            'urgent' if escalated else email.priority,
+            email.sentiment,
+            email.received_at or datetime.utcnow(),
+            self.sla_hours,
+            self.urgency_hours_per_point,
+            self.negative_sentiment_hours,
+            self.repeat_contact_hours if repeat_contact else 0.0
+        )
+
+        if entry is None:
+            entry = EmailQueueEntry(email_id=email.id)
+            db.add(entry)
+
+        entry.queue_rank = queue_rank
+        entry.urgency_score = urgency_score
+        entry.sla_deadline = sla_deadline
+
+    def remove(self, db: Session, email_id: int):
+        self.remove_many(db, [email_id])
+
+    def remove_many(self, db: Session, email_ids):
+        """Take several emails (ids or an id subquery) out of the queue"""
+        db.query(EmailQueueEntry).filter(EmailQueueEntry.email_id.in_(email_ids)).delete(synchronize_session=False)
+
+    def rebuild(self, db: Session, batch_size: int = 1000):
+        """Recompute queue entries for every open email"""
+        db.query(EmailQueueEntry).delete(synchronize_session=False)
+        open_emails = db.query(Email).filter(
+            Email.processed == False,
+            Email.response_sent == False
+        ).yield_per(batch_size)
+
+        for email in open_emails:
+            self.upsert(db, email)
+        db.commit()
+
+    def ensure_built(self, db: Session):
+        """Backfill the queue for databases created before it existed"""
+        if db.query(EmailQueueEntry.email_id).first() is None:
+            self.rebuild(db)
+
+    def next_emails(self, db: Session, limit: int = 20) -> List[Dict[str, Any]]:
+        """Next-best open emails, read straight off the queue_rank index"""
+        rows = db.query(EmailQueueEntry, Email).join(
+            Email, Email.id == EmailQueueEntry.email_id
+        ).order_by(EmailQueueEntry.queue_rank).limit(limit).all()
+
+        now = datetime.now(timezone.utc).timestamp()
+        return [{
+            "id": email.id,
+            "sender_email": email.sender_email,
+            "subject": email.subject,
+            "priority": email.priority,
+            "sentiment": email.sentiment,
+            "category": email.category,
+            "received_at": email.received_at,
+            "urgency_score": entry.urgency_score,
+            "sla_deadline": entry.sla_deadline,
+            "due_in_hours": round((entry.queue_rank - now) / 3600, 2),
+            "sla_breached": entry.sla_deadline < datetime.utcnow()
+        } for entry, email in rows]
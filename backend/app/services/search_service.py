@@ -0,0 +1,194 @@
+import re
+import html
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text, or_
+from sqlalchemy.orm import Session
+
+from app.models.database import Email
+from app.models.archive import ArchivedEmail
+
+# Private-use characters FTS5 wraps matches in; swapped for <mark> after the snippet is HTML-escaped
+_MATCH_START, _MATCH_END = "\ue000", "\ue001"
+
+class SearchService:
+    """Full-text search over email subjects and bodies using SQLite FTS5 indexes"""
+
+    def __init__(self):
+        # One external-content FTS table per email table: (fts table, model)
+        self.hot_index = ("email_fts", Email)
+        self.archive_index = ("archived_email_fts", ArchivedEmail)
+        self.snippet_tokens = 16
+
+    def is_supported(self, bind) -> bool:
+        """FTS5 indexing is only available on SQLite"""
+        return bind.dialect.name == "sqlite"
+
+    def ensure_index(self, engine):
+        """Create the FTS5 tables and the triggers that keep them in sync with the email tables"""
+        if not self.is_supported(engine):
+            return
+
+        with engine.begin() as conn:
+            for fts, model in (self.hot_index, self.archive_index):
+                self._ensure_fts_table(conn, fts, model.__table__.name)
+
+    def _ensure_fts_table(self, conn, fts: str, content: str):
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts}
+        ).first()
+
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"subject, body, content='{content}', content_rowid='id', "
+            f"tokenize='porter unicode61')"
+        ))
+
+        # External-content FTS tables must be told about every change
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {content} BEGIN "
+            f"INSERT INTO {fts}(rowid, subject, body) VALUES (new.id, new.subject, new.body); "
+            f"END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {content} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, subject, body) "
+            f"VALUES ('delete', old.id, old.subject, old.body); "
+            f"END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF subject, body ON {content} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, subject, body) "
+            f"VALUES ('delete', old.id, old.subject, old.body); "
+            f"INSERT INTO {fts}(rowid, subject, body) VALUES (new.id, new.subject, new.body); "
+            f"END"
+        ))
+
+        # Index rows that were stored before the FTS table existed
+        if not exists:
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+    def build_match_query(self, query: str) -> Optional[str]:
+        """Turn free text into a safe FTS5 MATCH expression (all terms, prefix on the last)"""
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return None
+
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        skip: int = 0,
+        limit: int = 20,
+        priority_filter: str = None,
+        sentiment_filter: str = None,
+        processed_filter: bool = None,
+        include_archived: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Search emails ranked by relevance, combined with the list endpoint filters"""
+        indexes = [self.hot_index, self.archive_index] if include_archived else [self.hot_index]
+        filters = (priority_filter, sentiment_filter, processed_filter)
+
+        if not self.is_supported(db.get_bind()):
+            results = []
+            for _, model in indexes:
+                results.extend(self._search_like(db, model, query, skip + limit, *filters))
+            return results[skip:skip + limit]
+
+        match_query = self.build_match_query(query)
+        if not match_query:
+            return []
+
+        # Each index returns its best skip+limit; merge by rank and cut the page
+        results = []
+        for fts, model in indexes:
+            results.extend(self._search_fts(db, fts, model, match_query, skip + limit, *filters))
+
+        results.sort(key=lambda result: result["rank"], reverse=True)
+        return results[skip:skip + limit]
+
+    def _search_fts(self, db: Session, fts: str, model, match_query: str, limit: int,
+                    priority_filter: str, sentiment_filter: str,
+                    processed_filter: bool) -> List[Dict[str, Any]]:
+        content = model.__table__.name
+        conditions = [f"{fts} MATCH :match_query"]
+        params: Dict[str, Any] = {
+            "match_query": match_query, "limit": limit, "match_start": _MATCH_START, "match_end": _MATCH_END
+        }
+
+        # Apply filters
+        if priority_filter:
+            conditions.append("e.priority = :priority")
+            params["priority"] = priority_filter
+        if sentiment_filter:
+            conditions.append("e.sentiment = :sentiment")
+            params["sentiment"] = sentiment_filter
+        if processed_filter is not None:
+            conditions.append("e.processed = :processed")
+            params["processed"] = processed_filter
+
+        # bm25 weights: subject matches count twice as much as body matches
+        rows = db.execute(text(
+            f"SELECT e.id, bm25({fts}, 2.0, 1.0) AS rank, "
+            f"snippet({fts}, 1, :match_start, :match_end, '...', {self.snippet_tokens}) AS snippet "
+            f"FROM {fts} JOIN {content} e ON e.id = {fts}.rowid "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY rank LIMIT :limit"
+        ), params).all()
+
+        if not rows:
+            return []
+
+        emails = {
+            email.id: email
+            for email in db.query(model).filter(model.id.in_([row.id for row in rows])).all()
+        }
+
+        return [
+            self._format_result(emails[row.id], -row.rank, self._highlight(row.snippet))
+            for row in rows if row.id in emails
+        ]
+
+    def _search_like(self, db: Session, model, query: str, limit: int,
+                     priority_filter: str, sentiment_filter: str,
+                     processed_filter: bool) -> List[Dict[str, Any]]:
+        """Unranked substring search for databases without an FTS index"""
+        pattern = f"%{query}%"
+        email_query = db.query(model).filter(
+            or_(model.subject.ilike(pattern), model.body.ilike(pattern))
+        )
+
+        if priority_filter:
+            email_query = email_query.filter(model.priority == priority_filter)
+        if sentiment_filter:
+            email_query = email_query.filter(model.sentiment == sentiment_filter)
+        if processed_filter is not None:
+            email_query = email_query.filter(model.processed == processed_filter)
+
+        emails = email_query.order_by(model.received_at.desc()).limit(limit).all()
+        return [self._format_result(email, None, None) for email in emails]
+
+    def _highlight(self, snippet: Optional[str]) -> Optional[str]:
+        """HTML-safe snippet: the email text is escaped and only the match markers become <mark>"""
+        if snippet is None:
+            return None
+        return html.escape(snippet).replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+
+    def _format_result(self, email, rank: Optional[float], snippet: Optional[str]) -> Dict[str, Any]:
+        return {
+            "id": email.id,
+            "sender_email": email.sender_email,
+            "subject": email.subject,
+            "priority": email.priority,
+            "sentiment": email.sentiment,
+            "category": email.category,
+            "processed": email.processed,
+            "received_at": email.received_at,
+            "rank": rank,
+            "snippet": snippet,
+            "archived": isinstance(email, ArchivedEmail)
+        }
@@ -0,0 +1,294 @@
+import logging
+import os
+import re
+import json
+import zlib
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import Email
+from app.models.archive import ArchivedEmail
+from app.utils.helpers import clean_email_body
+from app.utils.file_lock import file_lock
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Popcount of every byte value, for Hamming distances over packed LSH codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class SimilarityService:
+    """Local vector index over resolved tickets for similar-ticket retrieval
+
+    The index files are memory-mapped by every process using the same
+    VECTOR_INDEX_DIR (API workers, CLI scripts). Writes take an exclusive
+    file lock and reads a shared one, and each process re-reads meta.json
+    under the lock, so appends from one process are never overwritten by
+    another and become visible to all of them.
+    """
+
+    def __init__(self, index_dir: str = None):
+        self.index_dir = index_dir or os.getenv("VECTOR_INDEX_DIR", "./vector_index")
+        self.dim = int(os.getenv("SIMILARITY_DIM", "1024"))
+        self.code_bits = int(os.getenv("SIMILARITY_LSH_BITS", "32"))
+        if self.code_bits <= 0:
+            raise ValueError("SIMILARITY_LSH_BITS must be positive")
+        # packbits pads the last byte, so partial bytes round up
+        self.code_bytes = (self.code_bits + 7) // 8
+        self.rerank_candidates = int(os.getenv("SIMILARITY_RERANK_CANDIDATES", "256"))
+
+        # Fixed hyperplanes so codes stay valid across restarts
+        rng = np.random.default_rng(4242)
+        self._planes = rng.standard_normal((self.code_bits, self.dim)).astype(np.float32)
+
+        self._lock = threading.Lock()
+        self.count = 0
+        self.capacity = 0
+        self._vectors = None
+        self._codes = None
+        self._ids = None
+        self._load()
+
+    # --- Vectorization ---
+
+    def vectorize(self, subject: str, body: str) -> np.ndarray:
+        """Hashed unigram+bigram vector of the cleaned text, L2-normalized"""
+        words = re.findall(r"\w+", f"{subject or ''} {clean_email_body(body or '')}".lower())
+        tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokens:
+            h = zlib.crc32(token.encode("utf-8"))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign
+
+        # Sublinear term frequency
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _codes_for(self, vectors: np.ndarray) -> np.ndarray:
+        """Random-hyperplane LSH codes, packed to bytes"""
+        return np.packbits(vectors @ self._planes.T > 0, axis=-1)
+
+    # --- Storage ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def _read_meta(self) -> Optional[dict]:
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def _settings_match(self, meta: dict) -> bool:
+        return meta.get("dim") == self.dim and meta.get("code_bits") == self.code_bits
+
+    def _load(self):
+        """Open an existing index from disk"""
+        try:
+            meta = self._read_meta()
+            if meta is not None and not self._settings_match(meta):
+                logger.warning("Vector index was built with different settings; it will be rebuilt")
+            with self._index_lock(exclusive=False):
+                pass
+        except Exception as e:
+            logger.error("Error loading vector index: %s", e)
+            self.count = 0
+
+    def reset_after_fork(self):
+        """Replace the thread lock in a forked child; the on-disk state is re-synced on next use"""
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _index_lock(self, exclusive: bool):
+        """Hold the thread and cross-process index lock, with this process's view synced to disk"""
+        with self._lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            with file_lock(self._path("index.lock"), exclusive=exclusive):
+                self._sync()
+                yield
+
+    def _sync(self):
+        """Adopt the count and capacity last committed to meta.json by any process"""
+        meta = self._read_meta()
+        if meta is None or not self._settings_match(meta):
+            # Nothing built yet, or built with other settings: ensure_built rebuilds it
+            self.count = 0
+            return
+        if self._vectors is None or meta["capacity"] > self.capacity:
+            self._open(meta["capacity"])
+        self.count = meta["count"]
+
+    def _open(self, capacity: int):
+        """Memory-map the index files, growing them to the given capacity"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        layout = [
+            ("vectors.f32", np.float32, (capacity, self.dim)),
+            ("codes.u8", np.uint8, (capacity, self.code_bytes)),
+            ("ids.i64", np.int64, (capacity,))
+        ]
+
+        maps = []
+        for name, dtype, shape in layout:
+            path = self._path(name)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            with open(path, "ab") as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            maps.append(np.memmap(path, dtype=dtype, mode="r+", shape=shape))
+
+        self._vectors, self._codes, self._ids = maps
+        self.capacity = capacity
+
+    def _save_meta(self):
+        """Flush the maps, then publish the new count (atomically, for readers in other processes)"""
+        for array in (self._vectors, self._codes, self._ids):
+            array.flush()
+        tmp_path = self._path(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "code_bits": self.code_bits,
+                "count": self.count,
+                "capacity": self.capacity
+            }, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _append(self, email_ids: List[int], vectors: np.ndarray):
+        """Write rows after the last committed one (caller holds the exclusive index lock)"""
+        needed = self.count + len(email_ids)
+        if needed > self.capacity:
+            self._open(max(needed, self.capacity * 2, 1024))
+
+        end = self.count + len(email_ids)
+        self._vectors[self.count:end] = vectors
+        self._codes[self.count:end] = self._codes_for(vectors)
+        self._ids[self.count:end] = email_ids
+        self.count = end
+        self._save_meta()
+
+    # --- Index maintenance ---
+
+    def rebuild(self, db: Session, batch_size: int = 1000):
+        """Re-index every email whose response has been sent"""
+        with self._index_lock(exclusive=True):
+            self.count = 0
+            query = db.query(Email.id, Email.subject, Email.body).filter(
+                and_(
+                    Email.response_sent == True,
+                    Email.ai_response.isnot(None)
+                )
+            ).order_by(Email.id)
+
+            batch_ids, batch_vectors = [], []
+            for email_id, subject, body in query.yield_per(batch_size):
+                batch_ids.append(email_id)
+                batch_vectors.append(self.vectorize(subject, body))
+                if len(batch_ids) >= batch_size:
+                    self._append(batch_ids, np.vstack(batch_vectors))
+                    batch_ids, batch_vectors = [], []
+
+            if batch_ids:
+                self._append(batch_ids, np.vstack(batch_vectors))
+            elif self._vectors is not None:
+                self._save_meta()
+
+            logger.info("Vector index rebuilt with %d resolved tickets", self.count)
+
+    def ensure_built(self, db: Session):
+        """Build the index on first use"""
+        with self._index_lock(exclusive=False):
+            empty = self.count == 0
+        if empty:
+            self.rebuild(db)
+
+    def add(self, email: Email):
+        """Index a newly resolved ticket"""
+        with self._index_lock(exclusive=True):
+            if self.count and email.id in self._ids[:self.count]:
+                return
+            self._append([email.id], self.vectorize(email.subject, email.body)[np.newaxis, :])
+
+    def remove(self, email_id: int):
+        """Tombstone a deleted email so it is never returned"""
+        self.remove_many([email_id])
+
+    def remove_many(self, email_ids: List[int]):
+        """Tombstone several deleted emails in one pass over the index"""
+        with self._index_lock(exclusive=True):
+            if self.count and email_ids:
+                ids = self._ids[:self.count]
+                ids[np.isin(ids, email_ids)] = -1
+                self._ids.flush()
+
+    # --- Search ---
+
+    def search(self, subject: str, body: str, k: int = 5,
+               exclude_id: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Approximate top-k resolved tickets by cosine similarity"""
+        query = self.vectorize(subject, body)
+        query_code = self._codes_for(query[np.newaxis, :])[0]
+
+        with self._index_lock(exclusive=False):
+            if self.count == 0:
+                return []
+            codes = self._codes[:self.count]
+            ids = self._ids[:self.count]
+
+            # Hamming pre-filter over the compact codes, exact re-rank of the survivors
+            distances = _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.uint16)
+            candidate_count = min(self.rerank_candidates, self.count)
+            if candidate_count < self.count:
+                candidates = np.argpartition(distances, candidate_count - 1)[:candidate_count]
+            else:
+                candidates = np.arange(self.count)
+
+            scores = self._vectors[candidates] @ query
+            candidate_ids = ids[candidates]
+
+        order = np.argsort(-scores)
+        results = []
+        for position in order:
+            email_id = int(candidate_ids[position])
+            if email_id < 0 or email_id == exclude_id:
+                continue
+            results.append((email_id, float(scores[position])))
+            if len(results) >= k:
+                break
+
+        return results
+
+    def get_similar_tickets(self, db: Session, email: Email, k: int = 3) -> List[dict]:
+        """Resolved tickets similar to the email, with their sent responses"""
+        matches = self.search(email.subject, email.body, k=k, exclude_id=email.id)
+        if not matches:
+            return []
+
+        # Resolved tickets age into the archive but stay in the index
+        match_ids = [email_id for email_id, _ in matches]
+        emails = {}
+        for model in (Email, ArchivedEmail):
+            missing = [email_id for email_id in match_ids if email_id not in emails]
+            if missing:
+                emails.update((row.id, row) for row in db.query(model).filter(model.id.in_(missing)).all())
+
+        return [{
+            "id": email_id,
+            "sender_email": emails[email_id].sender_email,
+            "subject": emails[email_id].subject,
+            "category": emails[email_id].category,
+            "ai_response": emails[email_id].ai_response,
+            "score": round(score, 4)
+        } for email_id, score in matches if email_id in emails]
+
+# Shared so the API and startup code see the same memory-mapped index
+similarity_service = SimilarityService()
@@ -0,0 +1,174 @@
+import logging
+import os
+import re
+import zlib
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# A batch in sparse form: (row index, feature index, value) per non-zero entry
+SparseBatch = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+class TriageModel:
+    """Hashed-feature linear classifier for email priority and category"""
+
+    def __init__(self, dim: int = 2 ** 16):
+        self.dim = dim
+        # head name -> (weights [dim, classes], bias [classes], class labels)
+        self.heads: Dict[str, Tuple[np.ndarray, np.ndarray, List[str]]] = {}
+        # Hash of the loaded artifact, so caches can tell models apart
+        self.fingerprint: Optional[str] = None
+
+    # --- Features ---
+
+    def _features(self, subject: str, body: str) -> Dict[int, float]:
+        """Hashed unigram/bigram counts plus urgency style signals"""
+        raw = f"{subject or ''} {body or ''}"
+        words = re.findall(r"\w+", raw.lower())
+        tokens = [f"s:{word}" for word in re.findall(r"\w+", (subject or "").lower())]
+        tokens += words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+        features: Dict[int, float] = {}
+        for token in tokens:
+            index = zlib.crc32(token.encode("utf-8")) % self.dim
+            features[index] = features.get(index, 0.0) + 1.0
+
+        # Sublinear counts keep long emails from dominating
+        for index in features:
+            features[index] = 1.0 + np.log(features[index])
+
+        letters = [c for c in raw if c.isalpha()]
+        style = {
+            "__exclamations__": min(raw.count("!"), 5) / 5,
+            "__caps_ratio__": sum(1 for c in letters if c.isupper()) / len(letters) if letters else 0.0,
+            "__bias__": 1.0
+        }
+        for name, value in style.items():
+            index = zlib.crc32(name.encode("utf-8")) % self.dim
+            features[index] = features.get(index, 0.0) + value
+
+        return features
+
+    def featurize(self, texts: Sequence[Tuple[str, str]]) -> SparseBatch:
+        """Featurize (subject, body) pairs into a sparse batch"""
+        rows, cols, vals = [], [], []
+        for row, (subject, body) in enumerate(texts):
+            features = self._features(subject, body)
+            rows.extend([row] * len(features))
+            cols.extend(features.keys())
+            vals.extend(features.values())
+
+        return (
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(cols, dtype=np.int64),
+            np.asarray(vals, dtype=np.float32)
+        )
+
+    # --- Training ---
+
+    def _logits(self, batch: SparseBatch, n_rows: int, weights: np.ndarray, bias: np.ndarray) -> np.ndarray:
+        rows, cols, vals = batch
+        contributions = weights[cols] * vals[:, np.newaxis]
+        logits = np.empty((n_rows, weights.shape[1]), dtype=np.float32)
+        for c in range(weights.shape[1]):
+            logits[:, c] = np.bincount(rows, weights=contributions[:, c], minlength=n_rows)
+        return logits + bias
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def fit_head(self, name: str, texts: Sequence[Tuple[str, str]], labels: Sequence[str],
+                 epochs: int = 30, learning_rate: float = 0.5, l2: float = 1e-4,
+                 batch_size: int = 256, seed: int = 7):
+        """Train one softmax-regression head with mini-batch gradient descent"""
+        classes = sorted(set(labels))
+        label_index = {label: i for i, label in enumerate(classes)}
+        y = np.array([label_index[label] for label in labels], dtype=np.int64)
+
+        weights = np.zeros((self.dim, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+
+        # Featurize once; mini-batches slice the per-row feature lists
+        per_row = [self.featurize([text]) for text in texts]
+        rng = np.random.default_rng(seed)
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(texts))
+            step = learning_rate / (1 + epoch * 0.1)
+            for start in range(0, len(order), batch_size):
+                picked = order[start:start + batch_size]
+                rows = np.concatenate([np.full(len(per_row[i][0]), j) for j, i in enumerate(picked)])
+                cols = np.concatenate([per_row[i][1] for i in picked])
+                vals = np.concatenate([per_row[i][2] for i in picked])
+
+                probabilities = self._softmax(self._logits((rows, cols, vals), len(picked), weights, bias))
+                probabilities[np.arange(len(picked)), y[picked]] -= 1.0
+                probabilities /= len(picked)
+
+                gradient = np.zeros_like(weights)
+                np.add.at(gradient, cols, vals[:, np.newaxis] * probabilities[rows])
+                weights -= step * (gradient + l2 * weights)
+                bias -= step * probabilities.sum(axis=0)
+
+        self.heads[name] = (weights, bias, classes)
+
+    # --- Inference ---
+
+    def predict(self, name: str, texts: Sequence[Tuple[str, str]]) -> List[str]:
+        """Vectorized batch prediction for one head"""
+        weights, bias, classes = self.heads[name]
+        if not texts:
+            return []
+        logits = self._logits(self.featurize(texts), len(texts), weights, bias)
+        return [classes[i] for i in logits.argmax(axis=1)]
+
+    def has_head(self, name: str) -> bool:
+        return name in self.heads
+
+    # --- Serialization ---
+
+    def save(self, path: str):
+        """Save as a compressed .npz; weights are stored as float16 to keep the artifact small"""
+        arrays = {"dim": np.array(self.dim)}
+        for name, (weights, bias, classes) in self.heads.items():
+            arrays[f"{name}__weights"] = weights.astype(np.float16)
+            arrays[f"{name}__bias"] = bias
+            arrays[f"{name}__classes"] = np.array(classes)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "TriageModel":
+        with open(path, "rb") as f:
+            fingerprint = hashlib.sha1(f.read()).hexdigest()
+
+        with np.load(path) as data:
+            model = cls(dim=int(data["dim"]))
+            names = {key.split("__")[0] for key in data.files if key != "dim"}
+            for name in names:
+                model.heads[name] = (
+                    data[f"{name}__weights"].astype(np.float32),
+                    data[f"{name}__bias"],
+                    [str(label) for label in data[f"{name}__classes"]]
+                )
+        model.fingerprint = fingerprint
+        return model
+
+    @classmethod
+    def load_default(cls) -> Optional["TriageModel"]:
+        """Load the artifact at TRIAGE_MODEL_PATH if one has been trained"""
+        path = os.getenv("TRIAGE_MODEL_PATH", "./triage_model.npz")
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls.load(path)
+        except Exception as e:
+            logger.error("Error loading triage model: %s", e)
+            return None
@@ -0,0 +1,75 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.usage import LLMUsage
+
+load_dotenv()
+
+class UsageService:
+    """Per-email record of prompt/completion tokens and latency of generated responses"""
+
+    def __init__(self):
+        # USD per 1K tokens, for the cost estimate in reports
+        self.prompt_cost_per_1k = float(os.getenv("LLM_PROMPT_COST_PER_1K", "0.0005"))
+        self.completion_cost_per_1k = float(os.getenv("LLM_COMPLETION_COST_PER_1K", "0.0015"))
+
+    def record(self, db: Session, email_id: int, usage: Dict[str, Any]):
+        """Add a usage row; committed with the caller's transaction"""
+        db.add(LLMUsage(
+            email_id=email_id,
+            source=usage.get("source", "llm"),
+            model=usage.get("model"),
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            prompt_truncated_tokens=usage.get("prompt_truncated_tokens", 0),
+            latency_ms=usage.get("latency_ms", 0.0)
+        ))
+
+    def summary(self, db: Session, days: int = 7) -> Dict[str, Any]:
+        """Token totals, estimated cost and latency per day and overall"""
+        start_date = datetime.utcnow() - timedelta(days=days)
+        day = func.date(LLMUsage.created_at)
+
+        rows = db.query(
+            day.label("day"),
+            func.count(LLMUsage.id).label("generations"),
+            func.sum(case((LLMUsage.source == "llm", 1), else_=0)).label("llm_generations"),
+            func.coalesce(func.sum(LLMUsage.prompt_tokens), 0).label("prompt_tokens"),
+            func.coalesce(func.sum(LLMUsage.completion_tokens), 0).label("completion_tokens"),
+            func.sum(case((LLMUsage.prompt_truncated_tokens > 0, 1), else_=0)).label("truncated_prompts"),
+            func.avg(case((LLMUsage.source == "llm", LLMUsage.latency_ms))).label("avg_llm_latency_ms")
+        ).filter(LLMUsage.created_at >= start_date).group_by(day).order_by(day).all()
+
+        daily_stats = [{
+            "date": str(row.day),
+            "generations": row.generations,
+            "llm_generations": int(row.llm_generations or 0),
+            "prompt_tokens": int(row.prompt_tokens),
+            "completion_tokens": int(row.completion_tokens),
+            "truncated_prompts": int(row.truncated_prompts or 0),
+            "avg_llm_latency_ms": round(row.avg_llm_latency_ms or 0.0, 1),
+            "estimated_cost_usd": round(self.cost(row.prompt_tokens, row.completion_tokens), 4)
+        } for row in rows]
+
+        prompt_tokens = sum(day_stats["prompt_tokens"] for day_stats in daily_stats)
+        completion_tokens = sum(day_stats["completion_tokens"] for day_stats in daily_stats)
+        llm_generations = sum(day_stats["llm_generations"] for day_stats in daily_stats)
+        return {
+            "daily_stats": daily_stats,
+            "summary": {
+                "generations": sum(day_stats["generations"] for day_stats in daily_stats),
+                "llm_generations": llm_generations,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "avg_prompt_tokens": round(prompt_tokens / llm_generations, 1) if llm_generations else 0,
+                "truncated_prompts": sum(day_stats["truncated_prompts"] for day_stats in daily_stats),
+                "estimated_cost_usd": round(self.cost(prompt_tokens, completion_tokens), 4)
+            }
+        }
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.prompt_cost_per_1k + completion_tokens * self.completion_cost_per_1k) / 1000
@@ -0,0 +1,129 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.models.database import SessionLocal
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WriteJob = Callable[[Session], Any]
+
+write_batch_size = metrics.histogram(
+    "db_write_batch_jobs", "Write jobs committed per writer transaction", (),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250)
+)
+
+class WriteQueue:
+    """Single writer thread that applies queued write jobs in batched transactions
+
+    SQLite allows one writer at a time; funnelling ingestion and status
+    changes through one thread avoids lock contention between requests
+    and amortizes the commit (fsync) over every job in a batch. A job
+    receives the writer's session, must not commit, and should return
+    plain data rather than ORM objects.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.enabled = os.getenv("WRITE_QUEUE_ENABLED", "True").lower() == "true"
+        self.max_batch = int(os.getenv("WRITE_BATCH_MAX_JOBS", "100"))
+        self.max_wait = float(os.getenv("WRITE_BATCH_MAX_WAIT_MS", "5")) / 1000
+        self._queue: "queue.Queue[Optional[Tuple[WriteJob, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, job: WriteJob) -> Future:
+        """Queue a job; the future resolves with its return value once the batch is committed"""
+        future: Future = Future()
+        if not self.enabled:
+            self._apply([(job, future)])
+            return future
+        self._ensure_started()
+        self._queue.put((job, future))
+        return future
+
+    async def run(self, job: WriteJob) -> Any:
+        """Await a queued write without blocking the event loop"""
+        if not self.enabled:
+            return await asyncio.to_thread(lambda: self.submit(job).result())
+        return await asyncio.wrap_future(self.submit(job))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush queued jobs and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    # Take whatever is already queued, then wait briefly for stragglers
+                    item = self._queue.get_nowait() if self._queue.qsize() else \
+                        self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._apply(batch)
+            if stopping:
+                return
+
+    def _apply(self, batch: List[Tuple[WriteJob, Future]]):
+        """Commit the batch in one transaction; if any job fails, redo each job on its own"""
+        db = self.session_factory()
+        try:
+            try:
+                results = [job(db) for job, _ in batch]
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    return
+                logger.warning("Write batch of %d failed, retrying jobs individually: %s", len(batch), e)
+                for job, future in batch:
+                    self._apply([(job, future)])
+                return
+            write_batch_size.observe(len(batch))
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            logger.error("Error applying write batch: %s", e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            db.close()
+
+write_queue = WriteQueue()
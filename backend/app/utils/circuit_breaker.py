@@ -0,0 +1,122 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+from app.utils.metrics import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+
+# allow() token for an ordinary call; the half-open probe gets a token of its own
+_CALL = object()
+
+circuit_transitions = metrics.counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes", ("name", "state")
+)
+circuit_rejections = metrics.counter(
+    "circuit_breaker_rejections_total", "Calls short-circuited while a breaker was open", ("name",)
+)
+metrics.gauge(
+    "circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ("name",),
+    lambda: {(name,): _STATE_VALUES[breaker.state] for name, breaker in list(_breakers.items())}
+)
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker over error rate and slow-call rate
+
+    Calls finished in the last CIRCUIT_WINDOW_SECONDS are kept. Once at
+    least CIRCUIT_MIN_CALLS are in the window, the breaker opens when
+    the share of failures exceeds CIRCUIT_ERROR_RATE or the share of
+    calls slower than CIRCUIT_SLOW_CALL_SECONDS exceeds
+    CIRCUIT_SLOW_CALL_RATE. After CIRCUIT_OPEN_SECONDS it lets a single
+    probe call through (half-open). A good probe closes it; a failed or
+    slow probe opens it again. Calls let through before the breaker
+    opened that finish while it is open or half-open are ignored.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.window_seconds = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+        self.min_calls = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+        self.error_rate = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+        self.slow_call_seconds = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "10"))
+        self.slow_call_rate = float(os.getenv("CIRCUIT_SLOW_CALL_RATE", "0.5"))
+        self.open_seconds = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+
+        self.state = CLOSED
+        # (finished at, failed, slow)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at = 0.0
+        self._probe: Optional[object] = None
+        self._lock = threading.Lock()
+        _breakers[name] = self
+
+    @classmethod
+    def named(cls, name: str) -> "CircuitBreaker":
+        """The process-wide breaker for a dependency, shared by every service instance"""
+        return _breakers.get(name) or cls(name)
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logger.warning("Circuit breaker %s: %s -> %s", self.name, self.state, state)
+            self.state = state
+            circuit_transitions.inc(name=self.name, state=state)
+
+    def allow(self) -> Optional[object]:
+        """Token for a call that may go ahead now, or None; pass the token to record() when it finishes"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    circuit_rejections.inc(name=self.name)
+                    return None
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probe is not None:
+                    circuit_rejections.inc(name=self.name)
+                    return None
+                self._probe = object()
+                return self._probe
+            return _CALL
+
+    def record(self, token: object, duration: float, failed: bool):
+        """Outcome of a call allowed with token"""
+        now = time.monotonic()
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if token is not _CALL:
+                if token is self._probe and self.state == HALF_OPEN:
+                    self._probe = None
+                    self._calls.clear()
+                    if failed or slow:
+                        self._open(now)
+                    else:
+                        self._transition(CLOSED)
+                return
+            if self.state != CLOSED:
+                return
+
+            self._calls.append((now, failed, slow))
+            while self._calls and now - self._calls[0][0] > self.window_seconds:
+                self._calls.popleft()
+
+            total = len(self._calls)
+            if total >= self.min_calls:
+                failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+                slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+                if failures / total > self.error_rate or slow_calls / total > self.slow_call_rate:
+                    self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._calls.clear()
+        self._transition(OPEN)
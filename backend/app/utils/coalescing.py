@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.metrics import metrics
+
+coalesced_requests = metrics.counter(
+    "coalesced_requests_total", "Requests served by joining an identical in-flight computation", ("operation",)
+)
+
+class InFlightRequests:
+    """Concurrent callers with the same key share one in-flight computation (per process)"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Run compute in the threadpool, or wait for the identical call already running"""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            coalesced_requests.inc(operation=self.operation)
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leading caller went away (client disconnect); take over unless this caller did too
+                if not pending.cancelled():
+                    raise
+                return await self.run(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await run_in_threadpool(compute)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no other request was waiting
+            future.exception()
+            raise
+        finally:
+            # Cancelled (or otherwise interrupted) before a result: release the waiters
+            if not future.done():
+                future.cancel()
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
@@ -1,7 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import ast
 import json
 import re
-from typing import Any, Dict, List
+import unicodedata
+from urllib.parse import quote
+from typing import Any, Dict, List, Tuple
 
 def format_datetime(dt: datetime) -> str:
     """Format datetime for display"""
@@ -56,6 +59,19 @@ def safe_json_loads(json_str: str, default: Any = None) -> Any:
     except (json.JSONDecodeError, TypeError):
         return default
 
+def parse_analysis_field(value: str, default: Any = None) -> Any:
+    """Load a stored analysis field written as JSON or, by older imports, as a Python repr"""
+    if not value:
+        return default
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return default
+
 def calculate_urgency_score(subject: str, body: str) -> float:
     """Calculate urgency score based on content analysis"""
     text = f"{subject} {body}".lower()
@@ -104,9 +120,55 @@ def prioritize_emails(emails: List[Dict]) -> List[Dict]:
     """Sort emails by priority with urgent first"""
     def priority_key(email):
         priority_order = {'urgent': 0, 'not_urgent': 1}
+        # Urgent first, then oldest first within the same priority
         return (
             priority_order.get(email.get('priority', 'not_urgent'), 1),
-            email.get('received_at', datetime.min)
+            email.get('received_at') or datetime.min
         )
     
-    return sorted(emails, key=priority_key, reverse=True)
+    return sorted(emails, key=priority_key)
+
+def calculate_queue_rank(
+    urgency_score: float,
+    priority: str,
+    sentiment: str,
+    received_at: datetime,
+    sla_hours: Dict[str, float],
+    urgency_hours_per_point: float = 1.0,
+    negative_sentiment_hours: float = 2.0,
+    repeat_contact_hours: float = 0.0
+) -> Tuple[float, datetime]:
+    """Effective due time (epoch seconds) and SLA deadline for the work queue.
+    
+    Every ticket ages at the same rate, so ordering by effective due time is
+    the same as ordering by a score that grows with age; it never needs
+    recomputing as time passes.
+    """
+    sla_deadline = received_at + timedelta(hours=sla_hours.get(priority, sla_hours.get('not_urgent', 24)))
+    
+    # Urgent wording and unhappy customers pull the effective due time forward
+    pull_forward_hours = urgency_score * urgency_hours_per_point
+    if sentiment == 'negative':
+        pull_forward_hours += negative_sentiment_hours
+    # Customers chasing a ticket that is still open
+    pull_forward_hours += repeat_contact_hours
+    
+    effective_due = sla_deadline - timedelta(hours=pull_forward_hours)
+    if effective_due.tzinfo is None:
+        # Naive timestamps are stored in UTC
+        effective_due = effective_due.replace(tzinfo=timezone.utc)
+    
+    return effective_due.timestamp(), sla_deadline
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """Content-Disposition header value safe for any filename (RFC 6266 / RFC 5987).
+    
+    Control characters are dropped, an ASCII-only filename= is given for old
+    clients, and the full UTF-8 name goes in filename*=.
+    """
+    name = "".join(char for char in (filename or "") if unicodedata.category(char)[0] != "C").strip()
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    ascii_name = re.sub(r'["\\]', "", ascii_name).strip() or "attachment"
+    if not name:
+        return f'{disposition}; filename="{ascii_name}"'
+    return f"{disposition}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(name, safe='')}"
@@ -0,0 +1,151 @@
+import os
+import hmac
+import time
+import uuid
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from dotenv import load_dotenv
+
+from app.utils.serialization import dumps_json
+
+load_dotenv()
+
+# Set while a profiled request runs, so cached/offloaded work is done inline and shows up
+_profiling_active: ContextVar[bool] = ContextVar("profiling_active", default=False)
+
+# Accepted X-Profile / ?profile= values; anything else leaves the request unprofiled
+_MODES = {"1": "save", "true": "save", "save": "save", "report": "report"}
+
+def is_profiling() -> bool:
+    return _profiling_active.get()
+
+class RequestProfiler:
+    """Opt-in per-request profiling (pyinstrument sampling when installed, cProfile otherwise)
+
+    A request is profiled when it carries `X-Profile: 1` or `?profile=1`
+    together with `X-Profile-Token` matching PROFILING_TOKEN. Without a
+    configured token profiling is disabled. `report` instead of `1`
+    returns the profile summary in place of the normal response body;
+    values other than 1, true, save and report are ignored.
+    """
+
+    def __init__(self):
+        self.token = os.getenv("PROFILING_TOKEN", "")
+        self.output_dir = os.getenv("PROFILE_DIR", "./profiles")
+        self.top_functions = int(os.getenv("PROFILE_TOP_FUNCTIONS", "30"))
+        # Profilers hook the interpreter globally; run one at a time
+        self._lock = threading.Lock()
+
+    def requested_mode(self, request: Request) -> Optional[str]:
+        """None, 'save' or 'report', if the caller is allowed to profile"""
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        mode = _MODES.get((flag or "").strip().lower())
+        if not mode or not self.token:
+            return None
+        supplied = request.headers.get("x-profile-token", "")
+        if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+            return None
+        return mode
+
+    def _start(self):
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler(interval=0.001, async_mode="enabled")
+            profiler.start()
+            return "pyinstrument", profiler
+        except ImportError:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return "cprofile", profiler
+
+    def _save(self, kind: str, profiler, profile_id: str) -> Dict[str, Any]:
+        """Write the artifact and return its path plus a text summary"""
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        if kind == "pyinstrument":
+            path = os.path.join(self.output_dir, f"{profile_id}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            summary = profiler.output_text(unicode=True, color=False)
+        else:
+            import io
+            import pstats
+            path = os.path.join(self.output_dir, f"{profile_id}.pstats")
+            profiler.dump_stats(path)
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(self.top_functions)
+            summary = stream.getvalue()
+
+        return {"profiler": kind, "artifact": os.path.abspath(path), "summary": summary}
+
+    def _statement_report(self, statements: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+        """Statements ordered by total time; high execution counts point at N+1 loops"""
+        rows = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [{
+            "statement": " ".join(statement.split())[:500],
+            "executions": int(executions),
+            "total_ms": round(seconds * 1000, 3)
+        } for statement, (executions, seconds) in rows]
+
+    async def profile(self, request: Request, call_next, mode: str) -> Response:
+        """Run the request under the profiler and attach (or return) the profile report"""
+        from app.utils.metrics import track_queries
+
+        if not self._lock.acquire(blocking=False):
+            response = await call_next(request)
+            response.headers["X-Profile-Status"] = "busy"
+            return response
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        token = _profiling_active.set(True)
+        try:
+            with track_queries(record_statements=True) as queries:
+                start = time.perf_counter()
+                kind, profiler = self._start()
+                try:
+                    response = await call_next(request)
+                    # Drain the body inside the profile so serialization is included
+                    body = b"".join([chunk async for chunk in response.body_iterator])
+                finally:
+                    if kind == "pyinstrument":
+                        profiler.stop()
+                    else:
+                        profiler.disable()
+                elapsed = time.perf_counter() - start
+
+            report = self._save(kind, profiler, profile_id)
+        finally:
+            _profiling_active.reset(token)
+            self._lock.release()
+
+        report.update({
+            "id": profile_id,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql_queries": queries.count,
+            "sql_ms": round(queries.seconds * 1000, 3),
+            "statements": self._statement_report(queries.statements)
+        })
+
+        if mode == "report":
+            return Response(content=dumps_json(report), media_type="application/json")
+
+        # raw_headers keeps repeated headers such as Set-Cookie, which a dict would collapse
+        profiled = Response(content=body, status_code=response.status_code, background=response.background)
+        profiled.raw_headers = [
+            (name, value) for name, value in response.raw_headers if name.lower() != b"content-length"
+        ] + [(b"content-length", str(len(body)).encode("latin-1"))]
+        profiled.headers.update({
+            "X-Profile-Id": profile_id,
+            "X-Profile-Artifact": os.path.basename(report["artifact"]),
+            "X-SQL-Queries": str(queries.count),
+            "X-SQL-Time-Ms": str(report["sql_ms"])
+        })
+        return profiled
+
+request_profiler = RequestProfiler()
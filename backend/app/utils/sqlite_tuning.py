@@ -0,0 +1,41 @@
+import os
+import logging
+from sqlalchemy import event
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+def _sqlite_pragmas() -> dict:
+    return {
+        # Readers no longer block behind the writer (persistent on the database file)
+        "journal_mode": "WAL",
+        # Durable at checkpoints; safe with WAL and much cheaper than FULL per commit
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        # Negative cache_size is in KiB
+        "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE_MB", "256")) * 1024 * 1024,
+        "temp_store": "MEMORY",
+        # Wait for the write lock instead of failing with "database is locked"
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    }
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    except Exception as e:
+        logger.error("Error applying SQLite pragmas: %s", e)
+    finally:
+        cursor.close()
+
+def configure_sqlite(engine):
+    """Apply WAL mode and performance pragmas to every new SQLite connection of the engine"""
+    if engine.dialect.name != "sqlite":
+        return
+    if not event.contains(engine, "connect", _apply_pragmas):
+        event.listen(engine, "connect", _apply_pragmas)
+    # Connections opened before the hook was attached keep the old settings
+    engine.dispose()
@@ -0,0 +1,75 @@
+import re
+import logging
+import threading
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough BPE-like pieces (words, numbers, single symbols) for when tiktoken is not installed
+_APPROX_TOKEN = re.compile(r"[A-Za-z]{1,4}|\d{1,3}|[^\sA-Za-z\d]")
+
+class TokenCounter:
+    """Local token counts for a model (tiktoken when installed, a close approximation otherwise)"""
+
+    _encodings: Dict[str, object] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = self._load_encoding(model)
+
+    @classmethod
+    def _load_encoding(cls, model: str):
+        with cls._lock:
+            if model in cls._encodings:
+                return cls._encodings[model]
+            encoding = None
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # Missing package or no cached vocabulary (offline)
+                logger.info("tiktoken unavailable, approximating token counts: %s", e)
+            cls._encodings[model] = encoding
+            return encoding
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return len(_APPROX_TOKEN.findall(text))
+
+    def truncate(self, text: str, max_tokens: int, head_ratio: float = 0.7) -> Tuple[str, int]:
+        """Keep the head and tail of text within max_tokens; returns (text, tokens dropped).
+
+        The opening states the problem and the closing usually holds the
+        actual question, so the middle is what gets cut.
+        """
+        total = self.count(text)
+        if total <= max_tokens:
+            return text, 0
+
+        marker_tokens = self.count(f"\n[... {total} tokens omitted ...]\n")
+        keep = max(max_tokens - marker_tokens, 0)
+        head_tokens = int(keep * head_ratio)
+        tail_tokens = keep - head_tokens
+        dropped = total - keep
+
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            head = self.encoding.decode(tokens[:head_tokens])
+            tail = self.encoding.decode(tokens[len(tokens) - tail_tokens:]) if tail_tokens else ""
+        else:
+            spans = [match.span() for match in _APPROX_TOKEN.finditer(text)]
+            head = text[:spans[head_tokens - 1][1]] if head_tokens else ""
+            tail = text[spans[len(spans) - tail_tokens][0]:] if tail_tokens else ""
+
+        return f"{head.rstrip()}\n[... {dropped} tokens omitted ...]\n{tail.lstrip()}", dropped
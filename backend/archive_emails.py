@@ -0,0 +1,47 @@
+import sys
+
+from app.models.database import create_tables, engine, SessionLocal
+from app.utils.sqlite_tuning import configure_sqlite
+from app.services.archive_service import ArchiveService
+from app.services.change_log_service import ChangeLogService
+from app.services.search_service import SearchService
+from app.services.idempotency_service import IdempotencyService
+from app.services.attachment_service import AttachmentService
+from app.services.cache_service import dashboard_cache
+
+def archive_emails(older_than_days: int = None):
+    """Move old processed emails into the archive table (run periodically, e.g. nightly)"""
+    configure_sqlite(engine)
+    create_tables()
+    SearchService().ensure_index(engine)
+    change_log_service = ChangeLogService()
+    change_log_service.ensure_tracking(engine)
+    archive_service = ArchiveService()
+    db = SessionLocal()
+    
+    try:
+        moved = archive_service.archive(db, older_than_days=older_than_days)
+        if moved:
+            # Reaches the API's dashboard cache only through a shared CACHE_BACKEND_URL;
+            # with per-process caches the dashboards catch up within CACHE_TTL_SECONDS
+            dashboard_cache.invalidate()
+        
+        # Archived emails show up as deletions in the change log; old entries are dropped here
+        pruned = change_log_service.prune(db)
+        expired_keys = IdempotencyService().prune(db)
+        # Blobs left behind when a delete found them inside the grace period
+        orphaned_blobs = AttachmentService().sweep_orphaned_blobs(db)
+        
+        stats = archive_service.get_stats(db)
+        print(f"Archived {moved} emails "
+              f"({stats['hot_emails']} hot, {stats['archived_emails']} archived), "
+              f"pruned {pruned} change log entries, {expired_keys} idempotency keys "
+              f"and {orphaned_blobs} orphaned attachment blobs.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error archiving emails: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    archive_emails(int(sys.argv[1]) if len(sys.argv) > 1 else None)
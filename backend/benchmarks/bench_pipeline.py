@@ -0,0 +1,175 @@
+"""
+End-to-end benchmark of the analysis, ingestion and API hot paths.
+
+- AIService.analyze_email per email, per 100-email batch and on a cache hit
+- CSV import (import_csv_emails) per email
+- fetch_and_process_emails against the in-process IMAP stub, per email
+- every dashboard and list endpoint at each corpus size (default 10k/100k/1M rows)
+
+Uses its own database and data directory (BENCH_DIR, default ./bench_data),
+recreated on every run. Results are appended to benchmarks/results/pipeline.jsonl
+and compared with the previous run.
+
+Run from the backend directory:
+    python -m benchmarks.bench_pipeline [--sizes 10000,100000] [--rounds 5] [--skip-ingest]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import ResultLog, measure
+
+BENCH_DIR = os.path.abspath(os.getenv("BENCH_DIR", "./bench_data"))
+
+def _prepare_environment():
+    """Point every store at BENCH_DIR before the app modules read their settings"""
+    shutil.rmtree(BENCH_DIR, ignore_errors=True)
+    os.makedirs(BENCH_DIR)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}"
+    os.environ["VECTOR_INDEX_DIR"] = os.path.join(BENCH_DIR, "vector_index")
+    os.environ["BLOB_STORE_DIR"] = os.path.join(BENCH_DIR, "blobs")
+    os.environ["ANALYSIS_CACHE_PATH"] = os.path.join(BENCH_DIR, "analysis_cache.db")
+    os.environ["OPENAI_API_KEY"] = ""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+DASHBOARD_ENDPOINTS = [
+    "/api/dashboard/stats",
+    "/api/dashboard/recent-emails?limit=10",
+    "/api/dashboard/category-stats",
+    "/api/dashboard/response-stats",
+    "/api/dashboard/performance-metrics?days=7",
+    "/api/dashboard/indicator-stats",
+]
+
+LIST_ENDPOINTS = [
+    "/api/emails/?limit=100",
+    "/api/emails/?limit=100&priority_filter=urgent",
+    "/api/emails/?limit=100&skip=5000",
+    "/api/emails/urgent",
+    "/api/emails/unprocessed",
+    "/api/emails/queue?limit=20",
+    "/api/emails/search?q=password%20reset",
+]
+
+def bench_analysis(log, rounds: int):
+    from benchmarks.corpus import iter_emails
+    from app.services.ai_service import AIService
+
+    emails = list(iter_emails(100, seed=1))
+    ai_service = AIService()
+    analysis_cache = ai_service.analysis_cache
+
+    ai_service.analysis_cache = None
+    log.record("analyze_email.single", measure(lambda: ai_service.analyze_email(emails[0]), rounds=rounds * 10))
+    log.record("analyze_email.batch100", measure(
+        lambda: [ai_service.analyze_email(email_data) for email_data in emails], rounds=rounds, per_call=len(emails)
+    ))
+
+    if analysis_cache:
+        ai_service.analysis_cache = analysis_cache
+        ai_service.analyze_email(emails[0])
+        log.record("analyze_email.cache_hit", measure(lambda: ai_service.analyze_email(emails[0]), rounds=rounds * 10))
+
+def bench_ingestion(log, rounds: int):
+    from benchmarks.corpus import iter_emails, write_csv
+    from benchmarks.imap_stub import stub_imap
+    from app.models.database import SessionLocal
+    from app.api.email_routes import fetch_and_process_emails
+    from import_csv_emails import import_csv_emails
+
+    csv_rows = 200
+    csv_path = os.path.join(tempfile.mkdtemp(dir=BENCH_DIR), "corpus.csv")
+    write_csv(csv_path, csv_rows, seed=2)
+    log.record("import_csv.per_email", measure(
+        lambda: import_csv_emails(csv_path), rounds=max(2, rounds // 2), warmup=0, per_call=csv_rows
+    ), rows=csv_rows)
+
+    # EmailService fetches the latest 50 messages; each round gets a fresh mailbox
+    mailbox_size = 50
+    mailboxes = iter(range(1000, 1000 + rounds + 1))
+
+    def fetch_round():
+        emails = list(iter_emails(mailbox_size, seed=next(mailboxes)))
+        for email_data in emails:
+            email_data["subject"] = f"Support request: {email_data['subject']}"
+        db = SessionLocal()
+        try:
+            with stub_imap(emails):
+                asyncio.run(fetch_and_process_emails(1, db))
+        finally:
+            db.close()
+
+    log.record("fetch_and_process.per_email", measure(
+        fetch_round, rounds=rounds, warmup=1, per_call=mailbox_size
+    ), rows=mailbox_size)
+
+def bench_endpoints(log, sizes, rounds: int):
+    from fastapi.testclient import TestClient
+    from benchmarks.corpus import populate
+    from app.models.database import SessionLocal, Email
+    from app.services.cache_service import dashboard_cache
+    from app.services.queue_service import QueueService
+    from app.main import app
+
+    client = TestClient(app)
+
+    for size in sizes:
+        db = SessionLocal()
+        try:
+            missing = size - db.query(Email).count()
+            if missing > 0:
+                start = time.perf_counter()
+                populate(missing, seed=size)
+                print(f"Loaded {missing} emails in {time.perf_counter() - start:.1f}s")
+            QueueService().rebuild(db)
+        finally:
+            db.close()
+
+        print(f"\n-- {size} rows --")
+        for path in DASHBOARD_ENDPOINTS:
+            def uncached(path=path):
+                dashboard_cache.invalidate()
+                client.get(path).raise_for_status()
+            log.record(f"GET {path} [{size}]", measure(uncached, rounds=rounds), rows=size)
+
+        log.record(f"GET {DASHBOARD_ENDPOINTS[0]} cached [{size}]", measure(
+            lambda: client.get(DASHBOARD_ENDPOINTS[0]).raise_for_status(), rounds=rounds * 10
+        ), rows=size)
+
+        for path in LIST_ENDPOINTS:
+            log.record(f"GET {path} [{size}]", measure(
+                lambda path=path: client.get(path).raise_for_status(), rounds=rounds, warmup=1
+            ), rows=size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analysis, ingestion and API hot paths")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated corpus sizes")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--skip-ingest", action="store_true", help="Skip the CSV import and IMAP benchmarks")
+    parser.add_argument("--no-save", action="store_true", help="Do not append results to the history")
+    args = parser.parse_args()
+
+    _prepare_environment()
+
+    log = ResultLog("pipeline")
+    print(f"{'benchmark':<48}{'median':>15}{'p95':>18}")
+    bench_analysis(log, args.rounds)
+    if not args.skip_ingest:
+        bench_ingestion(log, args.rounds)
+    bench_endpoints(log, [int(size) for size in args.sizes.split(",") if size], args.rounds)
+
+    if not args.no_save:
+        log.save()
+
+    regressions = log.regressions()
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Serialization benchmark for a 100-email page of EmailResponse objects.
+
+Compares the standard JSONResponse path with FastJSONResponse and reports
+time per render and bytes on the wire with and without compression.
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization
+"""
+
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.schemas import EmailResponse
+from app.utils.serialization import FastJSONResponse
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+SAMPLE_SENTENCES = [
+    "I'm having trouble logging into my account and resetting the password is not working.",
+    "Could you please provide some guidance on the advanced search feature?",
+    "I noticed a charge on my billing statement that I don't recognize.",
+    "Your system has been down for hours and this is causing major problems for my business.",
+    "We're getting error 500 on all API requests and have a deadline today.",
+    "I'm interested in upgrading my subscription to include more storage space.",
+]
+
+def build_page(size: int = PAGE_SIZE):
+    """Build a page of realistic EmailResponse objects with full bodies and AI responses"""
+    now = datetime.utcnow()
+    page = []
+    for i in range(size):
+        received_at = now - timedelta(minutes=random.randint(1, 24 * 60))
+        page.append(EmailResponse(
+            id=i + 1,
+            sender_email=f"customer{i}@example.com",
+            subject=f"Support request #{i}: {random.choice(SAMPLE_SENTENCES)[:40]}",
+            body=" ".join(random.choice(SAMPLE_SENTENCES) for _ in range(25)),
+            received_at=received_at,
+            sentiment=random.choice(["positive", "negative", "neutral"]),
+            sentiment_score=random.random(),
+            priority=random.choice(["urgent", "not_urgent"]),
+            category="technical_support",
+            contact_details=json.dumps({"primary_email": f"customer{i}@example.com"}),
+            requirements=json.dumps(["access my account", "reset my password"]),
+            sentiment_indicators=json.dumps(["frustrated"]),
+            ai_response=" ".join(random.choice(SAMPLE_SENTENCES) for _ in range(12)),
+            response_sent=False,
+            processed=False,
+            created_at=received_at,
+            updated_at=received_at
+        ))
+    return page
+
+def time_render(response_class, content) -> float:
+    """Average milliseconds spent rendering the content with the response class"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        response_class(content)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+def main():
+    page = build_page()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        encoded = jsonable_encoder(page)
+    encode_ms = (time.perf_counter() - start) * 1000 / ROUNDS
+
+    results = []
+    for name, response_class in [("JSONResponse", JSONResponse), ("FastJSONResponse", FastJSONResponse)]:
+        body = response_class(encoded).body
+        row = {
+            "renderer": name,
+            "render_ms": time_render(response_class, encoded),
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, compresslevel=6))
+        }
+        try:
+            import brotli
+            row["br_bytes"] = len(brotli.compress(body, quality=4))
+        except ImportError:
+            row["br_bytes"] = None
+        results.append(row)
+
+    print(f"{PAGE_SIZE}-email page, {ROUNDS} rounds")
+    print(f"jsonable_encoder: {encode_ms:.3f} ms")
+    print(f"{'renderer':<18}{'render ms':>10}{'bytes':>10}{'gzip':>10}{'br':>10}")
+    for row in results:
+        br_bytes = row["br_bytes"] if row["br_bytes"] is not None else "n/a"
+        print(f"{row['renderer']:<18}{row['render_ms']:>10.3f}{row['bytes']:>10}{row['gzip_bytes']:>10}{br_bytes:>10}")
+
+if __name__ == "__main__":
+    main()
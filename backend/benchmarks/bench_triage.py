@@ -0,0 +1,65 @@
+"""
+Triage benchmark: trained TriageModel against the keyword heuristics.
+
+Uses a labeled CSV (subject, body, priority, category) or the Email table,
+holds out 20% for evaluation and reports accuracy and emails/second.
+
+Run from the backend directory:
+    python -m benchmarks.bench_triage [--csv labeled.csv]
+"""
+
+import argparse
+import random
+import time
+
+from app.services.ai_service import AIService
+from app.services.triage_model import TriageModel
+from train_triage_model import load_labeled_rows
+
+def accuracy(predictions, labels) -> float:
+    return sum(1 for p, l in zip(predictions, labels) if p == l) / len(labels) if labels else 0.0
+
+def main(csv_path: str = None):
+    rows = load_labeled_rows(csv_path)
+    random.Random(7).shuffle(rows)
+    split = int(len(rows) * 0.8)
+    train_rows, test_rows = rows[:split], rows[split:]
+    if not test_rows:
+        print("Not enough labeled emails to benchmark.")
+        return
+
+    train_texts = [(subject, body) for subject, body, _, _ in train_rows]
+    test_texts = [(subject, body) for subject, body, _, _ in test_rows]
+
+    model = TriageModel()
+    model.fit_head('priority', train_texts, [row[2] for row in train_rows])
+    model.fit_head('category', train_texts, [row[3] for row in train_rows])
+
+    ai_service = AIService()
+
+    start = time.perf_counter()
+    heuristic_priority = [ai_service._heuristic_priority(s, b) for s, b in test_texts]
+    heuristic_category = [ai_service._heuristic_category(s, b) for s, b in test_texts]
+    heuristic_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model_priority = model.predict('priority', test_texts)
+    model_category = model.predict('category', test_texts)
+    model_seconds = time.perf_counter() - start
+
+    n = len(test_rows)
+    print(f"Train {len(train_rows)} / test {n} emails")
+    print(f"{'classifier':<12}{'priority acc':>14}{'category acc':>14}{'emails/s':>12}")
+    for name, priorities, categories, seconds in [
+        ("heuristic", heuristic_priority, heuristic_category, heuristic_seconds),
+        ("model", model_priority, model_category, model_seconds),
+    ]:
+        print(f"{name:<12}"
+              f"{accuracy(priorities, [row[2] for row in test_rows]):>14.3f}"
+              f"{accuracy(categories, [row[3] for row in test_rows]):>14.3f}"
+              f"{n / seconds if seconds else float('inf'):>12.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", help="Labeled CSV (subject, body, priority, category)")
+    main(parser.parse_args().csv)
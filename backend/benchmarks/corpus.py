@@ -0,0 +1,179 @@
+"""
+Synthetic support-email corpus built from the demo templates.
+
+Emails are generated lazily, so the corpus scales to millions of rows
+without holding them in memory. Each email recombines sentences from one
+demo template with filler from the others, and gets a fresh sender, a
+timestamp spread over the last DAYS days and a processed/sent status.
+
+Run from the backend directory:
+    python -m benchmarks.corpus --rows 100000 --csv corpus.csv
+    python -m benchmarks.corpus --rows 1000000 --db
+"""
+
+import argparse
+import csv
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+from generate_demo_data import DEMO_EMAILS
+
+DAYS = 180
+
+FIRST_NAMES = ["alex", "sam", "jordan", "taylor", "morgan", "casey", "riley", "jamie", "drew", "quinn"]
+DOMAINS = ["example.com", "company.com", "startup.io", "corp.com", "enterprise.com", "mail.net"]
+SUBJECT_PREFIXES = ["", "", "Re: ", "Fwd: ", "Support: ", "Help: ", "Query: "]
+FILLER = [
+    "My order number is {n}.",
+    "I have attached a screenshot for reference.",
+    "This started happening after the latest update.",
+    "Please let me know if you need any more details.",
+    "You can reach me at 555-{a:03d}-{b:04d}.",
+    "Our account ID is ACC-{n}.",
+]
+
+def _sentences(text: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+_TEMPLATES = [(template, _sentences(template["body"])) for template in DEMO_EMAILS]
+
+def iter_emails(rows: int, seed: int = 42, days: int = DAYS) -> Iterator[Dict[str, Any]]:
+    """Yield `rows` realistic email dicts (sender_email, subject, body, received_at, labels, status)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    for i in range(rows):
+        template_index = rng.randrange(len(_TEMPLATES))
+        template, sentences = _TEMPLATES[template_index]
+
+        body = list(sentences)
+        # Drop or repeat a sentence and add filler so bodies are not identical
+        if len(body) > 2 and rng.random() < 0.5:
+            body.pop(rng.randrange(1, len(body)))
+        for _ in range(rng.randint(0, 3)):
+            body.insert(rng.randint(1, len(body)), rng.choice(FILLER).format(
+                n=rng.randint(10000, 99999), a=rng.randint(100, 999), b=rng.randint(0, 9999)
+            ))
+
+        received_at = now - timedelta(seconds=rng.randint(60, days * 24 * 3600))
+        processed = rng.random() < 0.7
+        response_sent = processed and rng.random() < 0.6
+
+        yield {
+            "sender_email": f"{rng.choice(FIRST_NAMES)}.{i}@{rng.choice(DOMAINS)}",
+            "subject": rng.choice(SUBJECT_PREFIXES) + template["subject"],
+            "body": " ".join(body),
+            "received_at": received_at,
+            "template_index": template_index,
+            "priority": template["priority"],
+            "sentiment": template["sentiment"],
+            "processed": processed,
+            "response_sent": response_sent,
+            "response_sent_at": received_at + timedelta(hours=rng.randint(1, 48)) if response_sent else None
+        }
+
+def write_csv(path: str, rows: int, seed: int = 42):
+    """Write the corpus in the column layout import_csv_emails.py expects"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sender", "subject", "body", "sent_date"])
+        for email_data in iter_emails(rows, seed=seed):
+            writer.writerow([
+                email_data["sender_email"],
+                email_data["subject"],
+                email_data["body"],
+                email_data["received_at"].strftime("%Y-%m-%d %H:%M:%S")
+            ])
+
+def populate(rows: int, seed: int = 42, batch_size: int = 5000) -> int:
+    """Bulk-insert pre-labelled emails (and their analysis rows) into the configured database.
+
+    Analysis for each template is computed once and reused, so loading a
+    million rows costs inserts only. Returns the number of rows inserted.
+    """
+    from app.models.database import create_tables, engine, Email
+    from app.utils.sqlite_tuning import configure_sqlite
+    from app.models.analysis import EmailRequirement, EmailSentimentIndicator
+    from app.services.ai_service import AIService
+    from sqlalchemy import func, insert, select
+
+    configure_sqlite(engine)
+    create_tables()
+    ai_service = AIService()
+    template_analysis = [ai_service.analyze_email(template) for template, _ in _TEMPLATES]
+
+    with engine.begin() as conn:
+        next_id = (conn.execute(select(func.max(Email.id))).scalar() or 0) + 1
+
+    inserted = 0
+    emails, requirements, indicators = [], [], []
+
+    def flush():
+        with engine.begin() as conn:
+            conn.execute(insert(Email.__table__), emails)
+            if requirements:
+                conn.execute(insert(EmailRequirement.__table__), requirements)
+            if indicators:
+                conn.execute(insert(EmailSentimentIndicator.__table__), indicators)
+        emails.clear()
+        requirements.clear()
+        indicators.clear()
+
+    for email_data in iter_emails(rows, seed=seed):
+        analysis = template_analysis[email_data["template_index"]]
+        email_id = next_id + inserted
+
+        emails.append({
+            "id": email_id,
+            "sender_email": email_data["sender_email"],
+            "subject": email_data["subject"],
+            "body": email_data["body"],
+            "received_at": email_data["received_at"],
+            "sentiment": analysis["sentiment"],
+            "sentiment_score": analysis["sentiment_score"],
+            "priority": analysis["priority"],
+            "category": analysis["category"],
+            "ai_response": "Thank you for contacting support." if email_data["response_sent"] else None,
+            "response_sent": email_data["response_sent"],
+            "response_sent_at": email_data["response_sent_at"],
+            "processed": email_data["processed"],
+            "created_at": email_data["received_at"],
+            "updated_at": email_data["received_at"]
+        })
+        requirements.extend(
+            {"email_id": email_id, "position": position, "requirement": requirement}
+            for position, requirement in enumerate(analysis["requirements"])
+        )
+        indicators.extend(
+            {"email_id": email_id, "indicator": indicator}
+            for indicator in analysis["sentiment_indicators"]
+        )
+
+        inserted += 1
+        if len(emails) >= batch_size:
+            flush()
+
+    if emails:
+        flush()
+    return inserted
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic support-email corpus")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv", help="Write a CSV for import_csv_emails.py")
+    parser.add_argument("--db", action="store_true", help="Insert into DATABASE_URL")
+    args = parser.parse_args()
+
+    if args.csv:
+        write_csv(args.csv, args.rows, seed=args.seed)
+        print(f"Wrote {args.rows} emails to {args.csv}")
+    if args.db:
+        print(f"Inserted {populate(args.rows, seed=args.seed)} emails")
+    if not args.csv and not args.db:
+        parser.error("choose --csv and/or --db")
+
+if __name__ == "__main__":
+    main()
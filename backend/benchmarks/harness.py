@@ -0,0 +1,106 @@
+"""
+Timing and result history shared by the benchmark scripts.
+
+Every run appends one JSON line per benchmark to
+benchmarks/results/<suite>.jsonl (timestamp, git commit, stats), and is
+compared with the previous run of the same benchmark so regressions show
+up run over run.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# A median this much slower than the previous run is reported as a regression
+REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.2"))
+
+def measure(fn: Callable[[], Any], rounds: int = 20, warmup: int = 2, per_call: int = 1) -> Dict[str, float]:
+    """Run fn repeatedly and return timing stats in milliseconds (per item when per_call > 1)"""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000 / per_call)
+
+    samples.sort()
+    median = statistics.median(samples)
+    return {
+        "rounds": rounds,
+        "min_ms": samples[0],
+        "median_ms": median,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean_ms": statistics.fmean(samples),
+        "ops_per_sec": 1000 / median if median else float("inf")
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def _previous(path: str) -> Dict[str, Dict[str, Any]]:
+    """Latest stored result per benchmark name"""
+    latest: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    latest[entry["name"]] = entry
+    return latest
+
+class ResultLog:
+    """Collects results for one suite run, prints them, and stores them on save()"""
+
+    def __init__(self, suite: str):
+        self.suite = suite
+        self.path = os.path.join(RESULTS_DIR, f"{suite}.jsonl")
+        self.previous = _previous(self.path)
+        self.entries: List[Dict[str, Any]] = []
+        self.context = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine()
+        }
+
+    def record(self, name: str, stats: Dict[str, float], **params):
+        entry = {"name": name, **self.context, **params, **stats}
+        self.entries.append(entry)
+
+        change = ""
+        before = self.previous.get(name)
+        if before and before.get("median_ms"):
+            delta = stats["median_ms"] / before["median_ms"] - 1
+            flag = "  REGRESSION" if delta > REGRESSION_THRESHOLD else ""
+            change = f"  ({delta:+.1%} vs {before.get('commit') or 'previous'}){flag}"
+        print(f"{name:<48}{stats['median_ms']:>12.3f} ms  p95 {stats['p95_ms']:>10.3f} ms{change}")
+
+    def regressions(self) -> List[str]:
+        names = []
+        for entry in self.entries:
+            before = self.previous.get(entry["name"])
+            if before and before.get("median_ms") and \
+                    entry["median_ms"] / before["median_ms"] - 1 > REGRESSION_THRESHOLD:
+                names.append(entry["name"])
+        return names
+
+    def save(self):
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry) + "\n")
+        print(f"Saved {len(self.entries)} results to {self.path}")
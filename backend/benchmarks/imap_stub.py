@@ -0,0 +1,69 @@
+"""
+In-process IMAP server stand-in for benchmarking the fetch pipeline.
+
+StubIMAP answers the subset of imaplib.IMAP4_SSL that EmailService uses
+(login, select, search, fetch, close, logout) from a list of RFC822
+messages, so fetch_and_process_emails can run without a network.
+"""
+
+import imaplib
+import re
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import format_datetime, make_msgid
+from typing import Any, Dict, Iterable, Iterator, List
+from unittest import mock
+
+def build_message(email_data: Dict[str, Any]) -> bytes:
+    """Serialize a corpus email dict to RFC822 bytes"""
+    message = EmailMessage()
+    message["From"] = email_data["sender_email"]
+    message["To"] = "support@example.com"
+    message["Subject"] = email_data["subject"]
+    message["Date"] = format_datetime(email_data["received_at"])
+    message["Message-ID"] = make_msgid(domain="bench.local")
+    message.set_content(email_data["body"])
+    return bytes(message)
+
+class StubIMAP:
+    """Serves a fixed mailbox; every message matches every SINCE search"""
+
+    def __init__(self, messages: List[bytes]):
+        self.messages = messages
+
+    def __call__(self, host: str = "", port: int = 993, *args, **kwargs) -> "StubIMAP":
+        # Stands in for the IMAP4_SSL class: "connecting" returns the same mailbox
+        return self
+
+    def login(self, user, password):
+        return "OK", [b"Logged in"]
+
+    def select(self, mailbox="INBOX"):
+        return "OK", [str(len(self.messages)).encode()]
+
+    def search(self, charset, *criteria):
+        return "OK", [" ".join(str(i + 1) for i in range(len(self.messages))).encode()]
+
+    def fetch(self, message_set, spec):
+        raw = self.messages[int(message_set) - 1]
+        if "HEADER" in spec:
+            header_end = raw.find(b"\n\n")
+            header = raw[:header_end + 2] if header_end >= 0 else raw
+            return "OK", [(f"{int(message_set)} (RFC822.SIZE {len(raw)} BODY[HEADER] {{{len(header)}}}".encode(), header), b")"]
+
+        partial = re.search(r"<0\.(\d+)>", spec)
+        body = raw[:int(partial.group(1))] if partial else raw
+        return "OK", [(f"{int(message_set)} (RFC822 {{{len(body)}}}".encode(), body), b")"]
+
+    def close(self):
+        return "OK", [b""]
+
+    def logout(self):
+        return "BYE", [b""]
+
+@contextmanager
+def stub_imap(emails: Iterable[Dict[str, Any]]) -> Iterator[StubIMAP]:
+    """Patch imaplib.IMAP4_SSL with a stub mailbox holding the given emails"""
+    stub = StubIMAP([build_message(email_data) for email_data in emails])
+    with mock.patch.object(imaplib, "IMAP4_SSL", stub):
+        yield stub
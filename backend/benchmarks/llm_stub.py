@@ -0,0 +1,123 @@
+"""
+Local stand-in for the OpenAI chat completions API with injectable delays and errors.
+
+In-process, stub_llm(ai_service, ...) replaces the service's client so
+generate_response_with_usage exercises the deadline, fallback and circuit
+breaker paths without a network or an API key:
+
+    with stub_llm(ai_service, delay=5.0, error_rate=0.3) as stub:
+        ...
+
+For end-to-end runs against a server, serve the same behaviour over HTTP
+and point the backend at it with OPENAI_BASE_URL:
+
+    python -m benchmarks.llm_stub --port 8099 --delay 2 --jitter 1 --error-rate 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=stub python run.py
+"""
+
+import argparse
+import random
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+from unittest import mock
+
+STUB_REPLY = (
+    "Thank you for reaching out. We have looked into your request and will follow up shortly.\n\n"
+    "Best regards,\nCustomer Support Team"
+)
+
+class StubLLMError(Exception):
+    """Injected API failure"""
+
+class StubLLM:
+    """Answers chat completions after `delay` (+/- jitter) seconds, failing `error_rate` of calls"""
+
+    def __init__(self, delay: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 reply: str = STUB_REPLY, seed: int = 0):
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.reply = reply
+        self.calls = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # Mirrors the client attribute path: client.chat.completions.create(...)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _outcome(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.failures += 1
+            delay = max(0.0, self.delay + self._random.uniform(-self.jitter, self.jitter))
+        return fail, delay
+
+    def create(self, model: str = "", messages: List[Dict[str, str]] = (), **kwargs) -> SimpleNamespace:
+        fail, delay = self._outcome()
+        time.sleep(delay)
+        if fail:
+            raise StubLLMError("Injected LLM failure")
+        prompt_tokens = sum(len(message["content"].split()) for message in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(self.reply.split()))
+        )
+
+@contextmanager
+def stub_llm(ai_service, **options) -> Iterator[StubLLM]:
+    """Route an AIService's LLM calls to a StubLLM (an API key is faked if none is set)"""
+    stub = StubLLM(**options)
+    with mock.patch.object(ai_service, "_llm_client", lambda: stub), \
+            mock.patch.object(ai_service, "openai_api_key", ai_service.openai_api_key or "stub"):
+        yield stub
+
+def create_app(stub: StubLLM):
+    """OpenAI-compatible HTTP endpoint backed by a StubLLM"""
+    from fastapi import FastAPI, Body
+    from fastapi.responses import JSONResponse
+    from starlette.concurrency import run_in_threadpool
+
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Dict[str, Any] = Body(...)):
+        try:
+            response = await run_in_threadpool(stub.create, request.get("model", ""), request.get("messages", []))
+        except StubLLMError as e:
+            return JSONResponse(status_code=503, content={"error": {"message": str(e), "type": "server_error"}})
+        return {
+            "id": f"stub-{stub.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": response.choices[0].message.content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "total_tokens": response.usage.prompt_tokens + response.usage.completion_tokens
+            }
+        }
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI chat completions API")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- seconds added to the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with HTTP 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    stub = StubLLM(delay=args.delay, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    uvicorn.run(create_app(stub), host="127.0.0.1", port=args.port)
@@ -1,17 +1,24 @@
 import csv
 import os
 from datetime import datetime
-from app.models.database import create_tables, SessionLocal, Email
+from app.models.database import create_tables, engine, SessionLocal, Email
 from app.services.ai_service import AIService
+from app.services.analysis_store import AnalysisStore
+from app.services.customer_profile_service import customer_profile_service
+from app.services.queue_service import QueueService
+from app.utils.sqlite_tuning import configure_sqlite
 
 CSV_PATH = r"c:\Users\asus\Downloads\68b1acd44f393_Sample_Support_Emails_Dataset.csv"
 
-def import_csv_emails():
+def import_csv_emails(csv_path: str = CSV_PATH):
+    configure_sqlite(engine)
     create_tables()
     ai_service = AIService()
+    analysis_store = AnalysisStore()
+    queue_service = QueueService()
     db = SessionLocal()
     count = 0
-    with open(CSV_PATH, newline='', encoding='utf-8') as csvfile:
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
             sender = row['sender']
@@ -38,16 +45,18 @@ def import_csv_emails():
                 sentiment_score=analysis['sentiment_score'],
                 priority=analysis['priority'],
                 category=analysis['category'],
-                contact_details=str(analysis['contact_details']),
-                requirements=str(analysis['requirements']),
-                sentiment_indicators=str(analysis['sentiment_indicators']),
                 processed=False
             )
             db.add(email_record)
+            db.flush()
+            analysis_store.save(db, email_record, analysis)
+            customer_profile_service.record_ingest(db, email_record)
+            queue_service.upsert(db, email_record)
             count += 1
         db.commit()
         db.close()
     print(f"Imported {count} emails from CSV.")
 
 if __name__ == "__main__":
-    import_csv_emails()
+    import sys
+    import_csv_emails(sys.argv[1] if len(sys.argv) > 1 else CSV_PATH)
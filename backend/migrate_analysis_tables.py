@@ -0,0 +1,36 @@
+from app.models.database import create_tables, SessionLocal, Email
+from app.models.analysis import EmailRequirement
+from app.services.analysis_store import AnalysisStore
+
+def migrate_analysis_tables(batch_size: int = 500):
+    """One-time migration: repair repr-encoded analysis columns and fill the child tables"""
+    create_tables()
+    analysis_store = AnalysisStore()
+    db = SessionLocal()
+    count = 0
+    
+    try:
+        last_id = 0
+        while True:
+            emails = db.query(Email).filter(Email.id > last_id).order_by(Email.id).limit(batch_size).all()
+            if not emails:
+                break
+            
+            for email in emails:
+                analysis_store.migrate_email(db, email)
+                count += 1
+            
+            last_id = emails[-1].id
+            db.commit()
+            print(f"Migrated {count} emails...")
+        
+        print(f"Migration complete: {count} emails, "
+              f"{db.query(EmailRequirement).count()} requirement rows.")
+    except Exception as e:
+        db.rollback()
+        print(f"Error migrating analysis tables: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_analysis_tables()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+AI-Powered Communication Assistant
+Production entry point: gunicorn managing uvicorn workers
+
+The application is imported once in the master process (preload), warmed
+up and frozen out of the garbage collector's view, so the NLP lexicons,
+compiled patterns and triage model are shared copy-on-write by every
+forked worker. The vector index is not process-private state: its files
+are mapped shared and every worker re-syncs with them under the index
+file lock, so tickets indexed by one worker are seen by all. Send HUP for
+a graceful restart of the workers.
+
+Other state stays per worker: /metrics counters, the generate-response
+coalescing map, the LLM circuit breaker and, unless CACHE_BACKEND_URL
+points at a shared cache, the dashboard cache and its invalidation.
+Without CACHE_BACKEND_URL a single worker is started unless
+WEB_CONCURRENCY asks for more.
+
+Use run.py for development (auto-reload, single process).
+"""
+
+import gc
+import os
+import sys
+import logging
+import multiprocessing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("serve")
+
+def cpu_count() -> int:
+    """CPUs this process may run on (respects container/affinity limits where available)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+def default_workers() -> int:
+    """One per core when workers share a cache; otherwise one, so writes invalidate the only cache"""
+    if os.getenv("CACHE_BACKEND_URL"):
+        # Analysis is CPU-bound and each worker runs an event loop, so one per core
+        return cpu_count()
+    logger.warning("CACHE_BACKEND_URL is not set: starting a single worker (set WEB_CONCURRENCY to override)")
+    return 1
+
+def check_worker_settings(workers: int):
+    """Warn about state that is not shared when several workers run"""
+    if workers > 1 and not os.getenv("CACHE_BACKEND_URL"):
+        logger.warning(
+            "%d workers without CACHE_BACKEND_URL: each worker keeps its own dashboard cache, and a write "
+            "only invalidates the cache of the worker that handled it (others serve stale data for up to "
+            "CACHE_TTL_SECONDS)", workers
+        )
+    if workers > 1:
+        logger.warning("/metrics, request coalescing and the LLM circuit breaker are per worker")
+
+def server_settings() -> dict:
+    """Server tuning, each overridable from the environment"""
+    return {
+        "host": os.getenv("SERVER_HOST", "0.0.0.0"),
+        "port": int(os.getenv("SERVER_PORT", "8000")),
+        "workers": int(os.getenv("WEB_CONCURRENCY") or default_workers()),
+        "backlog": int(os.getenv("SERVER_BACKLOG", "2048")),
+        # Longer than a typical reverse proxy idle timeout so the proxy closes first
+        "keepalive": int(os.getenv("SERVER_KEEPALIVE_SECONDS", "75")),
+        "timeout": int(os.getenv("SERVER_TIMEOUT_SECONDS", "120")),
+        "graceful_timeout": int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", "30")),
+        # Recycle workers periodically to bound memory growth; 0 disables
+        "max_requests": int(os.getenv("SERVER_MAX_REQUESTS", "10000")),
+        "max_requests_jitter": int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+    }
+
+def load_application():
+    """Import the app and exercise lazily initialized state before workers fork"""
+    from app.main import app, ai_service
+
+    sample = "Urgent: I cannot log in to my account since yesterday. Please help, thanks!"
+    ai_service.analyze_sentiment(sample)
+    ai_service.determine_priority("Support request", sample)
+    ai_service.categorize_email("Support request", sample)
+    ai_service.extract_requirements(sample)
+    ai_service.extract_sentiment_indicators(sample)
+    # The OpenAPI schema is otherwise built on the first /docs request in every worker
+    app.openapi()
+
+    # Move everything allocated so far out of the collector's generations so
+    # collections in the workers don't touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+def post_fork(server, worker):
+    """Drop state inherited from the master that must not be shared between workers"""
+    from app.models.database import engine
+    from app.services.similarity_service import similarity_service
+    # Each worker opens its own database connections
+    engine.dispose(close=False)
+    # The index lock is a threading.Lock: start the worker with a fresh one
+    # in case the master forked while holding it
+    similarity_service.reset_after_fork()
+
+def uvicorn_worker_class() -> str:
+    try:
+        import uvicorn_worker  # noqa: F401
+        return "uvicorn_worker.UvicornWorker"
+    except ImportError:
+        return "uvicorn.workers.UvicornWorker"
+
+def serve_gunicorn(settings: dict):
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{settings['host']}:{settings['port']}")
+            self.cfg.set("worker_class", uvicorn_worker_class())
+            self.cfg.set("preload_app", True)
+            self.cfg.set("post_fork", post_fork)
+            for name in ("workers", "backlog", "keepalive", "timeout", "graceful_timeout",
+                         "max_requests", "max_requests_jitter"):
+                self.cfg.set(name, settings[name])
+            self.cfg.set("accesslog", None)
+
+        def load(self):
+            return load_application()
+
+    Server().run()
+
+def serve_uvicorn(settings: dict):
+    """Fallback where gunicorn is unavailable (Windows): uvicorn's own process manager, no preload"""
+    import uvicorn
+    uvicorn.run(
+        "app.main:app",
+        host=settings["host"],
+        port=settings["port"],
+        workers=settings["workers"],
+        backlog=settings["backlog"],
+        timeout_keep_alive=settings["keepalive"],
+        timeout_graceful_shutdown=settings["graceful_timeout"],
+        limit_max_requests=settings["max_requests"] or None,
+        log_level="info"
+    )
+
+if __name__ == "__main__":
+    settings = server_settings()
+    check_worker_settings(settings["workers"])
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+
+    if gunicorn is None or sys.platform == "win32":
+        logger.warning("gunicorn is not available, starting uvicorn workers without preloading")
+        serve_uvicorn(settings)
+    else:
+        serve_gunicorn(settings)
@@ -0,0 +1,58 @@
+import argparse
+import csv
+import os
+import random
+import time
+from app.models.database import SessionLocal, Email
+from app.services.triage_model import TriageModel
+
+def load_labeled_rows(csv_path: str = None):
+    """Labeled (subject, body, priority, category) rows from a CSV file or the Email table"""
+    if csv_path:
+        with open(csv_path, newline='', encoding='utf-8') as csvfile:
+            return [
+                (row['subject'], row['body'], row['priority'], row['category'])
+                for row in csv.DictReader(csvfile)
+            ]
+    
+    db = SessionLocal()
+    try:
+        return [
+            (subject, body, priority, category)
+            for subject, body, priority, category in db.query(
+                Email.subject, Email.body, Email.priority, Email.category
+            ).filter(
+                Email.priority.isnot(None),
+                Email.category.isnot(None)
+            ).yield_per(1000)
+        ]
+    finally:
+        db.close()
+
+def train_triage_model(csv_path: str = None, output_path: str = None, epochs: int = 30):
+    rows = load_labeled_rows(csv_path)
+    if len(rows) < 10:
+        print(f"Need at least 10 labeled emails to train, found {len(rows)}.")
+        return
+    
+    random.Random(7).shuffle(rows)
+    texts = [(subject, body) for subject, body, _, _ in rows]
+    
+    model = TriageModel()
+    start = time.perf_counter()
+    model.fit_head('priority', texts, [row[2] for row in rows], epochs=epochs)
+    model.fit_head('category', texts, [row[3] for row in rows], epochs=epochs)
+    elapsed = time.perf_counter() - start
+    
+    output_path = output_path or os.getenv("TRIAGE_MODEL_PATH", "./triage_model.npz")
+    model.save(output_path)
+    print(f"Trained on {len(rows)} emails in {elapsed:.1f}s, saved to {output_path} "
+          f"({os.path.getsize(output_path) / 1024:.0f} KiB)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the priority/category triage model")
+    parser.add_argument("--csv", help="CSV with subject, body, priority and category columns")
+    parser.add_argument("--output", help="Artifact path (defaults to TRIAGE_MODEL_PATH)")
+    parser.add_argument("--epochs", type=int, default=30)
+    args = parser.parse_args()
+    train_triage_model(args.csv, args.output, args.epochs)
@@ -9,6 +9,8 @@ const api = axios.create({
   },
 });
 
+const idempotencyHeaders = (key) => (key ? { headers: { 'Idempotency-Key': key } } : undefined);
+
 // Email API endpoints
 export const emailAPI = {
   // Get all emails with filtering options
@@ -17,6 +19,9 @@ export const emailAPI = {
   // Get specific email by ID
   getEmail: (id) => api.get(`/emails/${id}`),
   
+  // Get emails changed since a sync token (omit since to get the current token)
+  getChanges: (since, limit) => api.get('/emails/changes', { params: { since, limit } }),
+  
   // Get urgent emails
   getUrgentEmails: () => api.get('/emails/urgent'),
   
@@ -26,16 +31,16 @@ export const emailAPI = {
   // Fetch new emails from server
   fetchNewEmails: (daysBack = 1) => api.post('/emails/fetch', { days_back: daysBack }),
   
-  // Generate AI response for email
-  generateResponse: (emailId, customContext = null) => 
+  // Generate AI response for email (a repeated idempotencyKey replays the first result)
+  generateResponse: (emailId, customContext = null, idempotencyKey = null) => 
     api.post(`/emails/${emailId}/generate-response`, { 
       email_id: emailId, 
       custom_context: customContext 
-    }),
+    }, idempotencyHeaders(idempotencyKey)),
   
-  // Send response email
-  sendResponse: (emailId, customResponse = null) => 
-    api.post(`/emails/${emailId}/send-response`, { custom_response: customResponse }),
+  // Send response email (retry with the same idempotencyKey to avoid a double send)
+  sendResponse: (emailId, customResponse = null, idempotencyKey = null) => 
+    api.post(`/emails/${emailId}/send-response`, { custom_response: customResponse }, idempotencyHeaders(idempotencyKey)),
   
   // Update email
   updateEmail: (emailId, updateData) => 
@@ -48,6 +53,16 @@ export const emailAPI = {
   // Delete email
   deleteEmail: (emailId) => 
     api.delete(`/emails/${emailId}`),
+  
+  // Bulk operations: selection is { ids: [...] } or { filters: { priority_filter, sentiment_filter, processed_filter } }
+  bulkUpdate: (selection, changes) => 
+    api.post('/emails/bulk/update', { ...selection, changes }),
+  
+  bulkMarkProcessed: (selection) => 
+    api.post('/emails/bulk/mark-processed', selection),
+  
+  bulkDelete: (selection) => 
+    api.post('/emails/bulk/delete', selection),
 };
 
 // Dashboard API endpoints
@@ -68,6 +83,10 @@ export const dashboardAPI = {
   // Get performance metrics
   getPerformanceMetrics: (days = 7) => 
     api.get('/dashboard/performance-metrics', { params: { days } }),
+  
+  // Get LLM token usage, cost and latency
+  getLlmUsage: (days = 7) => 
+    api.get('/dashboard/llm-usage', { params: { days } }),
 };
 
 // Utility functions